@@ -6,6 +6,7 @@ import { authService } from './authService';
 
 // Types
 export interface Product {
+  id?: string;
   nome: string;
   preco: number | null;
   sku: string;
@@ -17,6 +18,39 @@ export interface ProductsResponse {
   success: boolean;
   products: Product[];
   count: number;
+  total?: number;
+  next_cursor?: string | null;
+}
+
+export interface ProductSearchParams {
+  q?: string;
+  sku?: string;
+  barcode?: string;
+  min_price?: number;
+  max_price?: number;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface LookupItem {
+  code: string;
+  quantity?: number;
+}
+
+export interface LookupLine {
+  product: Product;
+  codes: string[];
+  quantity: number;
+  line_total: number | null;
+}
+
+export interface LookupResponse {
+  success: boolean;
+  lines: LookupLine[];
+  unmatched: { code: string; quantity: number }[];
+  matched_count: number;
+  unmatched_count: number;
+  total: number;
 }
 
 export interface CatalogRequest {
@@ -31,6 +65,21 @@ export interface CatalogResponse {
   file_name?: string;
 }
 
+export interface CatalogJob {
+  id: string;
+  status: 'queued' | 'rendering' | 'done' | 'failed';
+  title: string;
+  product_count: number;
+  file_name: string;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+  queued_seconds?: number | null;
+  rendering_seconds?: number | null;
+  download_url?: string | null;
+}
+
 export interface HealthResponse {
   status: string;
   notion_status: string;
@@ -50,9 +99,11 @@ class ApiService {
 
   private async request<T>(
     endpoint: string,
-    options: RequestInit = {}
+    options: RequestInit = {},
+    retryOnUnauthorized: boolean = true
   ): Promise<T> {
     const url = `${this.baseUrl}${endpoint}`;
+    const accessToken = authService.getAccessToken();
     
     const config: RequestInit = {
       headers: {
@@ -69,6 +120,14 @@ class ApiService {
       if (!response.ok) {
         // Handle authentication errors
         if (response.status === 401) {
+          // Access token expired: refresh once and retry. If another
+          // request refreshed the tokens meanwhile, just retry with them
+          if (retryOnUnauthorized && (
+            authService.getAccessToken() !== accessToken || await authService.refreshTokens()
+          )) {
+            return this.request<T>(endpoint, options, false);
+          }
+          
           // Clear auth state and redirect to login
           await authService.logout();
           window.location.href = '/login';
@@ -96,16 +155,61 @@ class ApiService {
     return this.request<ProductsResponse>('/api/products');
   }
 
-  // Generate catalog from selected products
-  async generateCatalog(request: CatalogRequest): Promise<CatalogResponse> {
-    return this.request<CatalogResponse>('/api/generate-catalog', {
+  // Search active products on the server (name, SKU, barcode, price range)
+  async searchProducts(params: ProductSearchParams): Promise<ProductsResponse> {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        query.set(key, String(value));
+      }
+    });
+    return this.request<ProductsResponse>(`/api/products?${query.toString()}`);
+  }
+
+  // Resolve a batch of scanned barcodes/SKUs into order lines
+  async lookupProducts(items: LookupItem[]): Promise<LookupResponse> {
+    return this.request<LookupResponse>('/api/products/lookup', {
+      method: 'POST',
+      body: JSON.stringify({ items }),
+    });
+  }
+
+  // Queue a catalog generation job
+  async submitCatalogJob(request: CatalogRequest): Promise<CatalogJob> {
+    return this.request<CatalogJob>('/api/catalog-jobs', {
       method: 'POST',
       body: JSON.stringify(request),
     });
   }
 
+  // Get catalog job status
+  async getCatalogJob(jobId: string): Promise<CatalogJob> {
+    return this.request<CatalogJob>(`/api/catalog-jobs/${jobId}`);
+  }
+
+  // Generate catalog from selected products (queues a job and polls until it finishes)
+  async generateCatalog(request: CatalogRequest, pollIntervalMs: number = 1000): Promise<CatalogResponse> {
+    let job = await this.submitCatalogJob(request);
+
+    while (job.status === 'queued' || job.status === 'rendering') {
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+      job = await this.getCatalogJob(job.id);
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Falha ao gerar catálogo');
+    }
+
+    return {
+      success: true,
+      message: `Catalog generated successfully with ${job.product_count} products`,
+      file_name: job.file_name,
+    };
+  }
+
   // Download catalog file
-  async downloadCatalog(filename: string): Promise<Blob> {
+  async downloadCatalog(filename: string, retryOnUnauthorized: boolean = true): Promise<Blob> {
+    const accessToken = authService.getAccessToken();
     const response = await fetch(`${this.baseUrl}/api/download/${filename}`, {
       headers: {
         ...authService.getAuthHeaders(),
@@ -114,6 +218,12 @@ class ApiService {
     
     if (!response.ok) {
       if (response.status === 401) {
+        if (retryOnUnauthorized && (
+          authService.getAccessToken() !== accessToken || await authService.refreshTokens()
+        )) {
+          return this.downloadCatalog(filename, false);
+        }
+        
         await authService.logout();
         window.location.href = '/login';
         throw new Error('Sessão expirada. Faça login novamente.');
@@ -34,6 +34,7 @@ class AuthService {
   private readonly ACCESS_TOKEN_KEY = 'ja_access_token';
   private readonly REFRESH_TOKEN_KEY = 'ja_refresh_token';
   private readonly USER_KEY = 'ja_user';
+  private refreshPromise: Promise<boolean> | null = null;
 
   /**
    * Login user with email and password
@@ -69,18 +70,24 @@ class AuthService {
    */
   async logout(): Promise<void> {
     const token = this.getAccessToken();
+    const refreshToken = this.getRefreshToken();
     
-    if (token) {
+    if (token || refreshToken) {
       try {
         // Add timeout to prevent hanging logout
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), 3000); // 3 second timeout
         
+        // Revokes both tokens server-side; the refresh token alone is enough
+        // once the access token has expired
+        const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+        if (token) {
+          headers['Authorization'] = `Bearer ${token}`;
+        }
         await fetch(`${API_BASE_URL}/api/auth/logout`, {
           method: 'POST',
-          headers: {
-            'Authorization': `Bearer ${token}`,
-          },
+          headers,
+          body: JSON.stringify({ refresh_token: refreshToken }),
           signal: controller.signal,
         });
         
@@ -94,6 +101,50 @@ class AuthService {
     this.clearStoredData();
   }
 
+  /**
+   * Exchange the refresh token for a new token pair.
+   * Returns false if there is no valid refresh token (the user must log in again).
+   */
+  async refreshTokens(): Promise<boolean> {
+    // Requests failing with 401 at the same time share one refresh: the
+    // server rotates the refresh token on first use, so a second call with
+    // the same token would fail and log the user out
+    if (!this.refreshPromise) {
+      this.refreshPromise = this.doRefreshTokens().finally(() => {
+        this.refreshPromise = null;
+      });
+    }
+    return this.refreshPromise;
+  }
+
+  private async doRefreshTokens(): Promise<boolean> {
+    const refreshToken = this.getRefreshToken();
+
+    if (!refreshToken) {
+      return false;
+    }
+
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/auth/refresh`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      });
+
+      if (!response.ok) {
+        return false;
+      }
+
+      this.setTokens(await response.json());
+      return true;
+    } catch (error) {
+      console.warn('Token refresh failed:', error);
+      return false;
+    }
+  }
+
   /**
    * Get current user information
    */
@@ -1,10 +1,40 @@
-import { defineConfig } from 'vite'
+import { defineConfig, type Plugin } from 'vite'
 import react from '@vitejs/plugin-react-swc'
 import path from 'path'
+import zlib from 'zlib'
+
+const COMPRESSIBLE = /\.(js|mjs|css|html|json|svg|txt|xml|wasm|webmanifest)$/
+
+// Emit .br and .gz next to each compressible bundle file. The API server
+// serves these precompressed variants instead of compressing at startup.
+function precompress(minSize = 1024): Plugin {
+  return {
+    name: 'precompress',
+    apply: 'build',
+    generateBundle(_options, bundle) {
+      for (const output of Object.values(bundle)) {
+        if (!COMPRESSIBLE.test(output.fileName)) continue
+        const content = output.type === 'chunk' ? output.code : output.source
+        const source = typeof content === 'string' ? Buffer.from(content) : Buffer.from(content)
+        if (source.length < minSize) continue
+
+        const brotli = zlib.brotliCompressSync(source, {
+          params: {
+            [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+            [zlib.constants.BROTLI_PARAM_SIZE_HINT]: source.length,
+          },
+        })
+        const gzip = zlib.gzipSync(source, { level: 9 })
+        this.emitFile({ type: 'asset', fileName: `${output.fileName}.br`, source: brotli })
+        this.emitFile({ type: 'asset', fileName: `${output.fileName}.gz`, source: gzip })
+      }
+    },
+  }
+}
 
 // https://vite.dev/config/
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
   resolve: {
     alias: {
       '@': path.resolve(__dirname, './src'),
@@ -2,23 +2,46 @@
 FastAPI server to serve product data and handle catalog generation.
 """
 
+import time
+
+# Measured before the remaining imports so the startup log covers them
+IMPORT_STARTED = time.perf_counter()
+
 import os
+import math
+import ipaddress
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import threading
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, status
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
 from .notion_api import NotionClient
-from .catalog_generator import CatalogGenerator
+from .product_store import ProductSync
+from .snapshot import ProductSnapshot
+from .product_cache import ProductCache
+from .product_index import ProductIndex
+from .catalog_jobs import CatalogJobQueue, CatalogJob, QueueFullError, UserJobLimitError
+from .health import HealthMonitor
+from .http_cache import file_response
+from .static_assets import StaticAssets, HASHED_ASSETS_PREFIX
+from .storage import CatalogStorage, catalog_path
+from .image_cache import ImageCache
+from .workers import (
+    run_in_thread, run_in_auth_pool, run_in_render_pool, warm_up_render_pool, PoolBusyError,
+    shutdown as shutdown_workers
+)
 from .utils import setup_logging
 from .auth import (
-    user_manager, UserLogin, UserCreate, Token, UserResponse,
-    create_tokens, verify_token, UserInDB
+    get_user_manager, UserLogin, UserCreate, Token, UserResponse, RefreshRequest, LogoutRequest,
+    create_tokens, verify_token, revoke_token, get_token_denylist, UserInDB, login_ip_limiter, login_email_limiter
 )
 
 # Configure logging
@@ -49,28 +72,167 @@ app.add_middleware(
 )
 
 # Initialize services
-notion_client = NotionClient()
-catalog_generator = CatalogGenerator()
+# With CATALOG_SNAPSHOT_PATH set, products and images come from a snapshot
+# file (python src/main.py --export-snapshot) and Notion is never contacted
+SNAPSHOT_PATH = os.getenv('CATALOG_SNAPSHOT_PATH')
+product_snapshot = ProductSnapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+OUTPUT_DIR = Path(os.getenv('OUTPUT_DIR', './output'))
+
+# Notion clients are created on first use rather than at import. PDFs are
+# rendered by the render pool workers, which own their CatalogGenerator, so
+# the API process never builds one (nor imports WeasyPrint)
+_notion_client: Optional[NotionClient] = None
+_product_sync: Optional[ProductSync] = None
+_services_lock = threading.Lock()
+
+def get_notion_client() -> NotionClient:
+    """Shared Notion client, created on first call."""
+    global _notion_client
+    with _services_lock:
+        if _notion_client is None:
+            _notion_client = NotionClient()
+        return _notion_client
+
+def get_product_sync() -> Optional[ProductSync]:
+    """Incremental sync through the local store, or None unless NOTION_SYNC_MODE=incremental."""
+    global _product_sync
+    if os.getenv('NOTION_SYNC_MODE', 'full') != 'incremental':
+        return None
+    notion_client = get_notion_client()
+    with _services_lock:
+        if _product_sync is None:
+            _product_sync = ProductSync(notion_client)
+        return _product_sync
+
+async def load_active_products() -> List[Dict[str, Any]]:
+    """Load active products without blocking the event loop (via the local store in incremental sync mode)."""
+    if product_snapshot:
+        return await run_in_thread(product_snapshot.load_products)
+    product_sync = get_product_sync()
+    if product_sync:
+        return await run_in_thread(product_sync.get_products)
+    return await get_notion_client().aget_active_products()
+
+product_cache = ProductCache(loader=load_active_products)
+product_index = ProductIndex()
+LOOKUP_MAX_ITEMS = int(os.getenv('PRODUCT_LOOKUP_MAX_ITEMS', '5000'))
+product_cache.add_listener(product_index.update)
+
+catalog_storage = CatalogStorage(output_dir=str(OUTPUT_DIR))
+GC_INTERVAL = int(os.getenv('OUTPUT_GC_INTERVAL', '3600'))
+API_WARM_UP = os.getenv('API_WARM_UP', 'true').lower() == 'true'
+
+# Reverse proxies whose X-Forwarded-For is believed (IPs or CIDR ranges)
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv('TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if network.strip()
+]
+
+async def render_job(job: CatalogJob, products: List[Dict[str, Any]]) -> str:
+    """Render a queued catalog job in the render process pool and index the result."""
+    from .catalog_generator import render_catalog
+
+    output_path = await run_in_render_pool(render_catalog, products=products, filename=job.file_name, title=job.title)
+    await run_in_thread(catalog_storage.register, output_path, job.owner)
+    return output_path
+
+catalog_jobs = CatalogJobQueue(render=render_job, db_path=str(catalog_storage.db_path))
+
+async def notion_deep_check() -> Dict[str, Any]:
+    """Reload products from Notion; also keeps the product cache warm."""
+    products = await product_cache.refresh()
+    if product_cache.fallback_error:
+        return {"status": "degraded", "error": product_cache.fallback_error, "active_products": len(products)}
+    return {"active_products": len(products)}
+
+health_monitor = HealthMonitor(
+    product_cache=product_cache,
+    catalog_jobs=catalog_jobs,
+    output_dir=OUTPUT_DIR,
+    deep_check=notion_deep_check
+)
 
 # Security
 security = HTTPBearer()
+# For endpoints that also work without an access token
+optional_security = HTTPBearer(auto_error=False)
 
-# Mount static files for frontend
+# Built frontend, served from memory (loaded on startup)
 frontend_dist_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'dist')
-if os.path.exists(frontend_dist_path):
-    # Mount assets directory for static files
-    assets_path = os.path.join(frontend_dist_path, 'assets')
-    if os.path.exists(assets_path):
-        app.mount("/assets", StaticFiles(directory=assets_path), name="assets")
-        logger.info(f"Frontend assets mounted from: {assets_path}")
+static_assets = StaticAssets(frontend_dist_path)
+
+async def collect_output_periodically():
+    """Enforce output retention and quota in the background."""
+    while True:
+        try:
+            await run_in_thread(catalog_storage.collect)
+        except Exception as e:
+            logger.error(f"Output garbage collection failed: {str(e)}")
+        await asyncio.sleep(GC_INTERVAL)
+
+async def warm_up_services():
+    """
+    Create the lazily initialized services ahead of the first request.
+    
+    Runs in the background after startup, so the server accepts requests
+    (and answers liveness probes) while the user store, token denylist,
+    Notion client, product cache and render workers come up.
+    """
+    started = time.perf_counter()
+    try:
+        await run_in_thread(get_user_manager)
+        await run_in_thread(get_token_denylist)
+        if not product_snapshot:
+            await run_in_thread(get_product_sync)
+            await run_in_thread(get_notion_client)
+        await product_cache.get()
+        await run_in_thread(warm_up_render_pool)
+        logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Warm-up failed after {time.perf_counter() - started:.2f}s: {str(e)}")
+
+@app.on_event("startup")
+async def startup_event():
+    """Start catalog job workers, output garbage collection, background health checks and warm-up."""
+    startup_started = time.perf_counter()
+    await run_in_thread(static_assets.load)
+    if product_snapshot:
+        info = await run_in_thread(product_snapshot.info)
+        await run_in_thread(product_snapshot.restore_images, ImageCache())
+        logger.info(f"Serving products from snapshot {SNAPSHOT_PATH} created at {info.get('created_at')}")
+    await catalog_jobs.start()
+    app.state.gc_task = asyncio.create_task(collect_output_periodically())
+    health_monitor.start()
+    app.state.warm_up_task = asyncio.create_task(warm_up_services()) if API_WARM_UP else None
     
-    # Mount other static files
-    app.mount("/static", StaticFiles(directory=frontend_dist_path), name="static")
-    logger.info(f"Frontend static files mounted from: {frontend_dist_path}")
-else:
-    logger.warning(f"Frontend dist directory not found: {frontend_dist_path}")
+    logger.info(
+        f"API started in {time.perf_counter() - IMPORT_STARTED:.2f}s "
+        f"(imports and setup {startup_started - IMPORT_STARTED:.2f}s, "
+        f"startup hooks {time.perf_counter() - startup_started:.2f}s)"
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and release worker pools."""
+    app.state.gc_task.cancel()
+    if app.state.warm_up_task:
+        app.state.warm_up_task.cancel()
+    health_monitor.stop()
+    await catalog_jobs.stop()
+    shutdown_workers()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInDB:
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    """Verified, unrevoked access token claims."""
+    payload = verify_token(credentials.credentials, token_type="access")
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+async def get_current_user(payload: Dict[str, Any] = Depends(get_token_payload)) -> UserInDB:
     """Get current authenticated user from JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,16 +241,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     try:
-        token = credentials.credentials
-        payload = verify_token(token)
-        if payload is None:
-            raise credentials_exception
-        
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-            
-        user = user_manager.get_user(email)
+        user = get_user_manager().get_user(payload["sub"])
         if user is None:
             raise credentials_exception
             
@@ -119,6 +272,31 @@ class Product(BaseModel):
     barcode: str = ""
     imagem_url: str = None
 
+class LookupItem(BaseModel):
+    code: str
+    quantity: int = 1
+
+class LookupRequest(BaseModel):
+    items: List[LookupItem]
+
+class LookupLine(BaseModel):
+    product: Dict[str, Any]
+    codes: List[str]
+    quantity: int
+    line_total: float = None
+
+class UnmatchedCode(BaseModel):
+    code: str
+    quantity: int
+
+class LookupResponse(BaseModel):
+    success: bool
+    lines: List[LookupLine]
+    unmatched: List[UnmatchedCode]
+    matched_count: int
+    unmatched_count: int
+    total: float
+
 class CatalogRequest(BaseModel):
     selected_products: List[Dict[str, Any]]
     title: str = "Catálogo JA Distribuidora"
@@ -129,12 +307,91 @@ class CatalogResponse(BaseModel):
     file_path: str = None
     file_name: str = None
 
+class CatalogJobResponse(BaseModel):
+    id: str
+    status: str
+    title: str
+    product_count: int
+    file_name: str
+    error: str = None
+    created_at: datetime
+    started_at: datetime = None
+    finished_at: datetime = None
+    queued_seconds: float = None
+    rendering_seconds: float = None
+    download_url: str = None
+
+def job_response(job: CatalogJob) -> CatalogJobResponse:
+    """Build the API view of a catalog job."""
+    return CatalogJobResponse(
+        id=job.id,
+        status=job.status,
+        title=job.title,
+        product_count=job.product_count,
+        file_name=job.file_name,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        download_url=f"/api/download/{job.file_name}" if job.status == "done" else None,
+        **job.timings()
+    )
+
 # Authentication endpoints
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the client that made a request.
+    
+    Behind a reverse proxy every connection comes from the proxy, so when
+    the peer is in TRUSTED_PROXIES the client is taken from
+    X-Forwarded-For: the right-most address that is not itself a trusted
+    proxy (entries further left can be forged by the client).
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    
+    forwarded = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",") if address.strip()]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+def too_many_login_attempts(wait: float) -> HTTPException:
+    """429 response for a throttled login, with Retry-After."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts. Try again later.",
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
 @app.post("/api/auth/login", response_model=Token)
-async def login(user_credentials: UserLogin):
-    """Authenticate user and return JWT tokens."""
+async def login(user_credentials: UserLogin, request: Request):
+    """
+    Authenticate user and return JWT tokens.
+    
+    Attempts are throttled per client IP and failed attempts per account;
+    throttled requests get a 429 before any password hashing is done. The
+    account token is taken before the password is checked, so concurrent
+    guesses cannot all pass, and given back when the login succeeds.
+    """
+    address = client_ip(request)
+    account = user_credentials.email.strip().lower()
+    
+    wait = login_ip_limiter.hit(address) or login_email_limiter.hit(account)
+    if wait:
+        logger.warning(f"Login throttled for {account} from {address}")
+        raise too_many_login_attempts(wait)
+    
     try:
-        user = user_manager.authenticate_user(user_credentials.email, user_credentials.password)
+        user = await run_in_auth_pool(get_user_manager().authenticate_user, user_credentials.email, user_credentials.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,12 +399,21 @@ async def login(user_credentials: UserLogin):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        login_email_limiter.refund(account)
         tokens = create_tokens(user)
         logger.info(f"User {user.email} logged in successfully")
         return tokens
     
     except HTTPException:
         raise
+    except PoolBusyError:
+        # The password was never checked
+        login_email_limiter.refund(account)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login temporarily unavailable. Try again shortly.",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(
@@ -155,10 +421,51 @@ async def login(user_credentials: UserLogin):
             detail="Login failed"
         )
 
+@app.post("/api/auth/refresh", response_model=Token)
+async def refresh_tokens(request: RefreshRequest):
+    """Exchange a refresh token for a new token pair; the old refresh token is revoked (rotation)."""
+    payload = verify_token(request.refresh_token, token_type="refresh")
+    user = get_user_manager().get_user(payload["sub"]) if payload and payload.get("sub") else None
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    await run_in_thread(revoke_token, payload)
+    logger.info(f"User {user.email} refreshed tokens")
+    return create_tokens(user)
+
 @app.post("/api/auth/logout")
-async def logout(current_user: UserInDB = Depends(get_current_user)):
-    """Logout user (token invalidation handled client-side)."""
-    logger.info(f"User {current_user.email} logged out")
+async def logout(request: Optional[LogoutRequest] = None,
+                 credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """
+    Logout user, revoking the access token and the refresh token.
+    
+    Either token is enough: once the access token has expired, a valid
+    refresh token in the body is still revoked.
+    """
+    payload = verify_token(credentials.credentials, token_type="access") if credentials else None
+    refresh_payload = None
+    if request and request.refresh_token:
+        refresh_payload = verify_token(request.refresh_token, token_type="refresh")
+    
+    if payload and refresh_payload and refresh_payload.get("sub") != payload.get("sub"):
+        # Someone else's refresh token
+        refresh_payload = None
+    if not (payload and payload.get("sub")) and not (refresh_payload and refresh_payload.get("sub")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    for token_payload in (payload, refresh_payload):
+        if token_payload:
+            await run_in_thread(revoke_token, token_payload)
+    
+    logger.info(f"User {(payload or refresh_payload)['sub']} logged out")
     return {"message": "Successfully logged out"}
 
 @app.get("/api/auth/me", response_model=UserResponse)
@@ -176,7 +483,7 @@ async def get_current_user_info(current_user: UserInDB = Depends(get_current_use
 async def create_user(user_data: UserCreate, admin_user: UserInDB = Depends(get_current_admin_user)):
     """Create new user (admin only)."""
     try:
-        new_user = user_manager.create_user(user_data)
+        new_user = await run_in_auth_pool(get_user_manager().create_user, user_data)
         logger.info(f"Admin {admin_user.email} created new user: {new_user.email}")
         return UserResponse(
             email=new_user.email,
@@ -203,93 +510,212 @@ async def root():
         "status": "healthy"
     }
 
+@app.get("/api/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "alive"}
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe from cached dependency status (never queries Notion)."""
+    result = health_monitor.readiness()
+    return JSONResponse(content=result, status_code=200 if result["ready"] else 503)
+
 @app.get("/api/health")
 async def health_check():
-    """Detailed health check."""
-    try:
-        # Test Notion connection
-        products = notion_client.get_active_products()
+    """Detailed health check, reporting the last background Notion check."""
+    deep = health_monitor.deep_result
+    if product_snapshot:
+        notion_status = f"offline: serving snapshot {SNAPSHOT_PATH}"
+    elif product_cache.fallback_error:
+        notion_status = f"degraded: serving last-known-good products ({product_cache.fallback_error})"
+    elif deep["status"] in ("ok", "degraded"):
+        # A degraded deep check has since been followed by a successful load
         notion_status = "connected"
-        product_count = len(products)
-    except Exception as e:
-        notion_status = f"error: {str(e)}"
-        product_count = 0
+    elif deep["status"] == "error":
+        notion_status = f"error: {deep['error']}"
+    else:
+        notion_status = "unknown"
     
     return {
         "status": "healthy",
         "notion_status": notion_status,
-        "active_products": product_count,
+        "active_products": product_cache.stats()["cached_products"],
+        "deep_check": deep,
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/api/products")
-async def get_products(current_user: UserInDB = Depends(get_current_user)):
-    """Get all active products from Notion database."""
+async def get_products(
+    q: Optional[str] = None,
+    sku: Optional[str] = None,
+    barcode: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Search active products (served from the product cache and its index).
+    
+    Without parameters all active products are returned. ``q`` matches
+    name words by prefix, ignoring accents and case; ``sku`` and ``barcode``
+    are exact. Pass ``next_cursor`` back as ``cursor`` to get the next page.
+    """
     try:
-        logger.info("Fetching active products from Notion")
-        products = notion_client.get_active_products()
-        
-        logger.info(f"Retrieved {len(products)} active products")
+        await product_cache.get()
+        result = product_index.search(
+            q=q, sku=sku, barcode=barcode,
+            min_price=min_price, max_price=max_price,
+            limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching products: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch products: {str(e)}")
+    
+    logger.info(f"Retrieved {len(result['products'])} of {result['total']} matching products")
+    return {
+        "success": True,
+        "products": result['products'],
+        "count": len(result['products']),
+        "total": result['total'],
+        "next_cursor": result['next_cursor']
+    }
+
+@app.post("/api/products/lookup", response_model=LookupResponse)
+async def lookup_products(request: LookupRequest, current_user: UserInDB = Depends(get_current_user)):
+    """
+    Resolve a batch of scanned barcodes/SKUs into order lines in one round trip.
+    
+    Codes are matched against the in-memory product index (barcode first,
+    then SKU), never against Notion directly.
+    """
+    if len(request.items) > LOOKUP_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {LOOKUP_MAX_ITEMS} items per lookup")
+    if any(item.quantity < 1 for item in request.items):
+        raise HTTPException(status_code=400, detail="Quantities must be at least 1")
+    
+    try:
+        await product_cache.get()
+    except Exception as e:
+        logger.error(f"Error loading products for lookup: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch products: {str(e)}")
+    
+    result = product_index.lookup_batch((item.code, item.quantity) for item in request.items)
+    logger.info(
+        f"User {current_user.email} looked up {len(request.items)} codes: "
+        f"{len(result['lines'])} products, {len(result['unmatched'])} unmatched"
+    )
+    return LookupResponse(
+        success=True,
+        lines=result['lines'],
+        unmatched=result['unmatched'],
+        matched_count=len(result['lines']),
+        unmatched_count=len(result['unmatched']),
+        total=result['total']
+    )
+
+@app.post("/api/admin/products/refresh")
+async def refresh_products(admin_user: UserInDB = Depends(get_current_admin_user)):
+    """Force a product cache refresh from Notion (admin only)."""
+    try:
+        products = await product_cache.refresh()
+        logger.info(f"Admin {admin_user.email} refreshed product cache ({len(products)} products)")
         return {
             "success": True,
-            "products": products,
-            "count": len(products)
+            "count": len(products),
+            "cache": product_cache.stats()
         }
     except Exception as e:
-        logger.error(f"Error fetching products: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch products: {str(e)}")
+        logger.error(f"Error refreshing products: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to refresh products: {str(e)}")
 
-@app.post("/api/generate-catalog")
-async def generate_catalog(request: CatalogRequest, background_tasks: BackgroundTasks, current_user: UserInDB = Depends(get_current_user)):
-    """Generate PDF catalog from selected products."""
+@app.get("/api/admin/products/cache")
+async def product_cache_stats(admin_user: UserInDB = Depends(get_current_admin_user)):
+    """Product cache hit/miss counters (admin only)."""
+    return product_cache.stats()
+
+async def submit_catalog_job(request: CatalogRequest, current_user: UserInDB) -> CatalogJob:
+    """Validate a catalog request and enqueue it, mapping backpressure to HTTP 429."""
+    if not request.selected_products:
+        raise HTTPException(status_code=400, detail="No products selected for catalog generation")
+    
     try:
-        if not request.selected_products:
-            raise HTTPException(status_code=400, detail="No products selected for catalog generation")
-        
-        logger.info(f"User {current_user.email} generating catalog with {len(request.selected_products)} products")
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"catalogo_ja_distribuidora_{timestamp}.pdf"
-        
-        # Generate catalog
-        output_path = catalog_generator.generate_catalog(
+        job = await catalog_jobs.submit(
+            owner=current_user.email,
             products=request.selected_products,
-            filename=output_filename
+            title=request.title
         )
-        
-        logger.info(f"Catalog generated successfully by {current_user.email}: {output_path}")
-        
-        return CatalogResponse(
-            success=True,
-            message=f"Catalog generated successfully with {len(request.selected_products)} products",
-            file_path=output_path,
-            file_name=output_filename
+    except (QueueFullError, UserJobLimitError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "10"}
         )
     
-    except Exception as e:
-        logger.error(f"Error generating catalog: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate catalog: {str(e)}")
+    logger.info(f"User {current_user.email} queued catalog job {job.id} with {len(request.selected_products)} products")
+    return job
+
+@app.post("/api/catalog-jobs", response_model=CatalogJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_catalog_job(request: CatalogRequest, current_user: UserInDB = Depends(get_current_user)):
+    """Queue a catalog generation job and return its id immediately."""
+    job = await submit_catalog_job(request, current_user)
+    return job_response(job)
+
+@app.get("/api/catalog-jobs/{job_id}", response_model=CatalogJobResponse)
+async def get_catalog_job(job_id: str, current_user: UserInDB = Depends(get_current_user)):
+    """Get the status of a catalog generation job."""
+    job = await catalog_jobs.get(job_id)
+    if job is None or (job.owner != current_user.email and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@app.post("/api/generate-catalog")
+async def generate_catalog(request: CatalogRequest, current_user: UserInDB = Depends(get_current_user)):
+    """Generate PDF catalog from selected products and wait for the result."""
+    job = await submit_catalog_job(request, current_user)
+    job = await catalog_jobs.wait(job.id)
+    
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=f"Failed to generate catalog: {job.error}")
+    
+    logger.info(f"Catalog generated successfully by {current_user.email}: {job.file_path}")
+    
+    return CatalogResponse(
+        success=True,
+        message=f"Catalog generated successfully with {job.product_count} products",
+        file_path=job.file_path,
+        file_name=job.file_name
+    )
 
 @app.get("/api/download/{filename}")
-async def download_catalog(filename: str, current_user: UserInDB = Depends(get_current_user)):
-    """Download generated catalog PDF."""
+async def download_catalog(filename: str, request: Request, current_user: UserInDB = Depends(get_current_user)):
+    """Download generated catalog PDF (supports Range, ETag and If-None-Match)."""
     try:
         # Security check - only allow PDF files and sanitize filename
-        if not filename.endswith('.pdf') or '..' in filename:
+        if not filename.endswith('.pdf') or '..' in filename or '/' in filename:
             raise HTTPException(status_code=400, detail="Invalid filename")
         
-        output_dir = os.path.join(os.path.dirname(__file__), '..', 'output')
-        file_path = os.path.join(output_dir, filename)
+        file_path = catalog_path(OUTPUT_DIR, filename)
         
-        if not os.path.exists(file_path):
+        if not file_path.is_file():
             raise HTTPException(status_code=404, detail="File not found")
         
-        return FileResponse(
-            path=file_path,
-            filename=filename,
-            media_type='application/pdf'
-        )
+        # Lease the file so garbage collection keeps it until the response is sent
+        await run_in_thread(catalog_storage.acquire, filename)
+        release = BackgroundTask(run_in_thread, catalog_storage.release, filename)
+        
+        # Hashing a large file for the ETag happens once per file version
+        try:
+            return await run_in_thread(
+                file_response, request, file_path, filename, 'application/pdf', background=release
+            )
+        except Exception:
+            await run_in_thread(catalog_storage.release, filename)
+            raise
     
     except HTTPException:
         raise
@@ -299,28 +725,26 @@ async def download_catalog(filename: str, current_user: UserInDB = Depends(get_c
 
 # Serve frontend for all non-API routes (SPA fallback)
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
-    """Serve frontend HTML for all non-API routes."""
+async def serve_frontend(full_path: str, request: Request):
+    """Serve built frontend files from memory, with index.html for all other non-API routes."""
     # Skip API routes
     if full_path.startswith("api/"):
         raise HTTPException(status_code=404, detail="API endpoint not found")
     
-    frontend_dist_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'dist')
-    
-    # Try to serve static files directly first
-    requested_file = os.path.join(frontend_dist_path, full_path)
-    if os.path.exists(requested_file) and os.path.isfile(requested_file):
-        return FileResponse(requested_file)
-    
-    # Serve index.html for all frontend routes (SPA fallback)
-    index_path = os.path.join(frontend_dist_path, 'index.html')
+    # /static/<file> is kept as an alias of /<file>
+    file_path = full_path[len("static/"):] if full_path.startswith("static/") else full_path
+    asset = static_assets.get(file_path)
+    if asset is None:
+        if full_path.startswith((HASHED_ASSETS_PREFIX, "static/")):
+            # A missing bundle must not be answered with the HTML shell
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        # Serve index.html for all frontend routes (SPA fallback)
+        asset = static_assets.get("index.html")
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Frontend not found")
     
-    if os.path.exists(index_path):
-        with open(index_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content, status_code=200)
-    else:
-        raise HTTPException(status_code=404, detail="Frontend not found")
+    return static_assets.response(request, asset)
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,9 +4,14 @@ Handles user authentication, JWT token generation, and user management.
 """
 
 import os
-import json
+import time
+import uuid
+import sqlite3
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -15,6 +20,9 @@ from fastapi import HTTPException, status
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from .rate_limit import KeyedRateLimiter
+from .user_store import get_user_store, UserExistsError
+
 # Load environment variables
 load_dotenv()
 
@@ -27,8 +35,19 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified-token cache and revocation list
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+TOKEN_DENYLIST_PATH = os.getenv("AUTH_DENYLIST_PATH", "./data/revoked_tokens.db")
+
+# Password hashing: hashes made with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Login throttling: attempts per client IP, failed attempts per account
+LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("LOGIN_IP_RATE_PER_MINUTE", "30"))
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_EMAIL_FAILURES_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_FAILURES_PER_MINUTE", "5"))
+LOGIN_EMAIL_BURST = float(os.getenv("LOGIN_EMAIL_BURST", "5"))
 
 # Pydantic Models
 class User(BaseModel):
@@ -56,6 +75,12 @@ class Token(BaseModel):
     refresh_token: str
     token_type: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -67,71 +92,48 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 class UserManager:
-    """Simple user management using JSON file storage."""
+    """User management on top of a pluggable user store (see user_store.py)."""
     
-    def __init__(self, users_file: str = "users.json"):
-        self.users_file = os.path.join(os.path.dirname(__file__), '..', users_file)
-        self.users = self._load_users()
+    def __init__(self, store=None):
+        self.store = store or get_user_store()
+        if not self.store.count():
+            # Create default admin user
+            try:
+                self.store.add(self._to_record(self._create_default_admin()))
+            except UserExistsError:
+                # Another worker starting on the same empty store seeded it first
+                pass
     
-    def _load_users(self) -> Dict[str, UserInDB]:
-        """Load users from JSON file or create default admin user."""
-        try:
-            if os.path.exists(self.users_file):
-                with open(self.users_file, 'r') as f:
-                    users_data = json.load(f)
-                    return {
-                        email: UserInDB(**user_data) 
-                        for email, user_data in users_data.items()
-                    }
-            else:
-                # Create default admin user
-                default_users = self._create_default_users()
-                self._save_users(default_users)
-                return default_users
-        except Exception as e:
-            logger.error(f"Error loading users: {e}")
-            return self._create_default_users()
-    
-    def _create_default_users(self) -> Dict[str, UserInDB]:
+    def _create_default_admin(self) -> UserInDB:
         """Create default admin user."""
         admin_email = os.getenv("ADMIN_EMAIL", "admin@jadistribuidora.com")
         admin_password = os.getenv("ADMIN_PASSWORD", "admin123")
         
-        return {
-            admin_email: UserInDB(
-                email=admin_email,
-                full_name="JA Distribuidora Admin",
-                role="admin",
-                is_active=True,
-                created_at=datetime.now(),
-                hashed_password=get_password_hash(admin_password)
-            )
-        }
+        return UserInDB(
+            email=admin_email,
+            full_name="JA Distribuidora Admin",
+            role="admin",
+            is_active=True,
+            created_at=datetime.now(),
+            hashed_password=get_password_hash(admin_password)
+        )
     
-    def _save_users(self, users: Dict[str, UserInDB] = None):
-        """Save users to JSON file."""
-        users_to_save = users or self.users
-        try:
-            # Convert to serializable format
-            users_data = {}
-            for email, user in users_to_save.items():
-                user_dict = user.dict()
-                if user_dict.get('created_at'):
-                    user_dict['created_at'] = user_dict['created_at'].isoformat()
-                users_data[email] = user_dict
-            
-            with open(self.users_file, 'w') as f:
-                json.dump(users_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving users: {e}")
+    @staticmethod
+    def _to_record(user: UserInDB) -> Dict[str, Any]:
+        """Convert to the serializable form kept by the store."""
+        user_dict = user.dict()
+        if user_dict.get('created_at'):
+            user_dict['created_at'] = user_dict['created_at'].isoformat()
+        return user_dict
     
     def get_user(self, email: str) -> Optional[UserInDB]:
         """Get user by email."""
-        return self.users.get(email)
+        record = self.store.get(email)
+        return UserInDB(**record) if record else None
     
     def create_user(self, user_data: UserCreate) -> UserInDB:
         """Create a new user."""
-        if user_data.email in self.users:
+        if self.store.get(user_data.email):
             raise HTTPException(
                 status_code=400,
                 detail="User with this email already exists"
@@ -146,22 +148,38 @@ class UserManager:
             hashed_password=get_password_hash(user_data.password)
         )
         
-        self.users[user_data.email] = user
-        self._save_users()
+        try:
+            self.store.add(self._to_record(user))
+        except UserExistsError:
+            # Created concurrently by another request or worker
+            raise HTTPException(
+                status_code=400,
+                detail="User with this email already exists"
+            )
         return user
     
     def authenticate_user(self, email: str, password: str) -> Optional[UserInDB]:
-        """Authenticate user with email and password."""
+        """
+        Authenticate user with email and password.
+        
+        If the stored hash uses another bcrypt cost than BCRYPT_ROUNDS it is
+        replaced with a fresh hash while the plain password is at hand.
+        """
         user = self.get_user(email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            self.store.update(self._to_record(user))
+            logger.info(f"Rehashed password for {email} with {BCRYPT_ROUNDS} rounds")
         return user
     
     def get_all_users(self) -> Dict[str, UserInDB]:
         """Get all users (admin only)."""
-        return self.users
+        return {email: UserInDB(**record) for email, record in self.store.all().items()}
 
 # Password utilities
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -172,6 +190,105 @@ def get_password_hash(password: str) -> str:
     """Generate password hash."""
     return pwd_context.hash(password)
 
+class TokenCache:
+    """
+    Bounded LRU of already verified tokens -> claims.
+
+    Skips the signature check and claim parsing for tokens seen before.
+    Entries are dropped once the token's exp has passed.
+    """
+    
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is None:
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+    
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class TokenDenylist:
+    """
+    Server-side list of revoked token ids (jti), stored in SQLite.
+    
+    Lookups hit an in-memory set. The set is reloaded when PRAGMA
+    data_version reports a commit from another connection, so revocations
+    made by other worker processes are seen on their next request.
+    Entries are kept only until the token would have expired anyway.
+    """
+    
+    def __init__(self, db_path: str = TOKEN_DENYLIST_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS revoked (jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        self._conn.commit()
+        self._data_version = None
+        self._revoked = set()
+    
+    def _refresh(self) -> None:
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            rows = self._conn.execute("SELECT jti FROM revoked WHERE expires_at > ?", (time.time(),))
+            self._revoked = {row[0] for row in rows}
+            self._data_version = data_version
+    
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return jti in self._revoked
+    
+    def revoke(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute("INSERT OR REPLACE INTO revoked (jti, expires_at) VALUES (?, ?)", (jti, expires_at))
+            self._conn.execute("DELETE FROM revoked WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            self._revoked.add(jti)
+
+
+token_cache = TokenCache()
+
+# Revocation list, opened on first use (it creates its SQLite file)
+_token_denylist: Optional[TokenDenylist] = None
+_token_denylist_lock = threading.Lock()
+
+def get_token_denylist() -> TokenDenylist:
+    """Shared TokenDenylist, created on first call."""
+    global _token_denylist
+    if _token_denylist is None:
+        with _token_denylist_lock:
+            if _token_denylist is None:
+                _token_denylist = TokenDenylist()
+    return _token_denylist
+
+# Both are checked before any bcrypt work. Per-IP buckets are charged for
+# every attempt, per-account buckets only for failed ones, so successful
+# logins never use up an account's budget
+login_ip_limiter = KeyedRateLimiter(
+    rate=LOGIN_IP_RATE_PER_MINUTE / 60, capacity=LOGIN_IP_BURST, name="login-ip"
+)
+login_email_limiter = KeyedRateLimiter(
+    rate=LOGIN_EMAIL_FAILURES_PER_MINUTE / 60, capacity=LOGIN_EMAIL_BURST, name="login-email"
+)
+
 # JWT utilities
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
@@ -181,7 +298,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -189,17 +306,42 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     """Create JWT refresh token."""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[Dict[str, Any]]:
-    """Verify JWT token and return payload."""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+def verify_token(token: str, token_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Verify JWT token and return payload.
+    
+    Previously verified tokens are served from the token cache; revoked
+    tokens and tokens of the wrong type are rejected.
+    
+    Args:
+        token: Encoded JWT
+        token_type: Required "type" claim ("access" or "refresh"), if any
+    
+    Returns:
+        Token claims, or None if the token is invalid
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        token_cache.put(token, payload)
+    
+    if token_type and payload.get("type") != token_type:
+        return None
+    if payload.get("jti") and get_token_denylist().is_revoked(payload["jti"]):
         return None
+    return payload
+
+def revoke_token(payload: Dict[str, Any]) -> None:
+    """Revoke a verified token until it expires."""
+    if payload.get("jti"):
+        get_token_denylist().revoke(payload["jti"], float(payload.get("exp", time.time())))
 
 def create_tokens(user: UserInDB) -> Token:
     """Create both access and refresh tokens for user."""
@@ -212,5 +354,16 @@ def create_tokens(user: UserInDB) -> Token:
         token_type="bearer"
     )
 
-# Initialize user manager
-user_manager = UserManager()
\ No newline at end of file
+# User manager, created on first use: opening the store may hash the
+# default admin password, which should not slow down importing this module
+_user_manager: Optional[UserManager] = None
+_user_manager_lock = threading.Lock()
+
+def get_user_manager() -> UserManager:
+    """Shared UserManager, created on first call."""
+    global _user_manager
+    if _user_manager is None:
+        with _user_manager_lock:
+            if _user_manager is None:
+                _user_manager = UserManager()
+    return _user_manager
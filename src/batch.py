@@ -0,0 +1,211 @@
+"""
+Batch generation of catalog variants described in a YAML manifest.
+
+Example manifest::
+
+    title: Catálogo JA Distribuidora      # default title for every variant
+    variants:
+      - name: capas-ate-50
+        title: Capas até R$ 50
+        filter:
+          q: capa                          # name words (prefix, accent-insensitive)
+          max_price: 50
+        sort: preco                        # field, "-field" for descending, or a list
+      - name: linha-a
+        filter:
+          sku_prefix: [A, AB]
+        sort: [nome, -preco]
+        limit: 200
+
+Products have no category field, so categories and segments are expressed
+through name words, SKU prefixes, explicit SKU/barcode lists and price bands.
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from .catalog_generator import DEFAULT_TITLE, chunk_worker_share, render_catalog, warm_up_worker
+from .image_cache import ImageCache
+from .product_index import normalize_code, normalize_text, tokenize
+from .utils import sanitize_filename
+
+SORT_FIELDS = ('nome', 'preco', 'sku', 'barcode')
+
+logger = logging.getLogger(__name__)
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a batch manifest.
+
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    import yaml
+
+    with open(path, encoding='utf-8') as f:
+        manifest = yaml.safe_load(f) or {}
+
+    variants = manifest.get('variants')
+    if not isinstance(variants, list) or not variants:
+        raise ValueError("Manifest must define a non-empty 'variants' list")
+
+    names = set()
+    for variant in variants:
+        name = variant.get('name')
+        if not name:
+            raise ValueError("Every variant needs a 'name'")
+        if not isinstance(name, str) or name != sanitize_filename(name):
+            # Names also become file names (watch mode's latest/<name>.pdf)
+            raise ValueError(f"Invalid variant name '{name}' (a plain file name, without paths)")
+        if name in names:
+            raise ValueError(f"Duplicate variant name: {name}")
+        names.add(name)
+        filename = variant.get('filename')
+        if filename is not None and (not isinstance(filename, str) or filename != sanitize_filename(filename)):
+            raise ValueError(f"Variant '{name}': invalid filename '{filename}' (a plain file name, without paths)")
+        for key in _sort_keys(variant.get('sort')):
+            if key.lstrip('-') not in SORT_FIELDS:
+                raise ValueError(f"Variant '{name}': cannot sort by '{key}' (use one of {', '.join(SORT_FIELDS)})")
+
+    return manifest
+
+
+def _sort_keys(sort: Any) -> List[str]:
+    if not sort:
+        return []
+    return [sort] if isinstance(sort, str) else list(sort)
+
+
+def _matches(product: Dict[str, Any], rules: Dict[str, Any]) -> bool:
+    """Check a product against a variant filter; all given rules must match."""
+    price = product.get('preco')
+    if rules.get('min_price') is not None and (price is None or price < rules['min_price']):
+        return False
+    if rules.get('max_price') is not None and (price is None or price > rules['max_price']):
+        return False
+
+    sku = normalize_code(product.get('sku'))
+    prefixes = rules.get('sku_prefix')
+    if prefixes:
+        prefixes = [prefixes] if isinstance(prefixes, str) else prefixes
+        if not any(sku.startswith(normalize_code(prefix)) for prefix in prefixes):
+            return False
+    if rules.get('skus') and sku not in {normalize_code(code) for code in rules['skus']}:
+        return False
+    if rules.get('barcodes') and \
+            normalize_code(product.get('barcode')) not in {normalize_code(code) for code in rules['barcodes']}:
+        return False
+
+    if rules.get('q'):
+        words = tokenize(product.get('nome'))
+        if not all(any(word.startswith(token) for word in words) for token in tokenize(rules['q'])):
+            return False
+
+    return True
+
+
+def select_products(products: List[Dict[str, Any]], variant: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Apply a variant's filter, sort order and limit.
+
+    Sorting is stable and applied from the last key to the first, so
+    ``[nome, -preco]`` sorts by name, then by descending price. Products
+    without a value for a sort field always come last.
+    """
+    rules = variant.get('filter') or {}
+    selected = [product for product in products if _matches(product, rules)]
+
+    for key in reversed(_sort_keys(variant.get('sort'))):
+        field = key.lstrip('-')
+        descending = key.startswith('-')
+        present = [p for p in selected if p.get(field) not in (None, '')]
+        missing = [p for p in selected if p.get(field) in (None, '')]
+        present.sort(
+            key=lambda p: p[field] if field == 'preco' else normalize_text(str(p[field])),
+            reverse=descending
+        )
+        selected = present + missing
+
+    if variant.get('limit'):
+        selected = selected[:int(variant['limit'])]
+    return selected
+
+
+def render_variant(products: List[Dict[str, Any]], filename: str, title: str) -> Dict[str, Any]:
+    """
+    Render one variant in a worker process and time it.
+
+    Returns:
+        Dictionary with output path and render seconds
+    """
+    started = time.perf_counter()
+    output_path = render_catalog(products, filename, title)
+    return {'output_path': output_path, 'seconds': time.perf_counter() - started}
+
+
+def run_batch(manifest: Dict[str, Any], products: List[Dict[str, Any]],
+              image_cache: ImageCache, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Render every variant of a manifest from one product list.
+
+    Images of all selected products are downloaded once into the shared
+    on-disk image cache, then variants are rendered in parallel by a pool
+    of warmed-up worker processes.
+
+    Args:
+        manifest: Parsed manifest (see load_manifest)
+        products: Products fetched once for the whole batch
+        image_cache: Image cache shared with the worker processes
+        workers: Worker process count (BATCH_WORKERS or CPU count by default)
+
+    Returns:
+        One result per variant, in manifest order, with name, product count,
+        output path, render seconds, size and error
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    default_title = manifest.get('title') or DEFAULT_TITLE
+
+    results = []
+    jobs = []
+    for variant in manifest['variants']:
+        selected = select_products(products, variant)
+        filename = sanitize_filename(variant.get('filename') or f"{variant['name']}_{timestamp}.pdf")
+        result = {'name': variant['name'], 'products': len(selected), 'output_path': None,
+                  'seconds': None, 'size_bytes': None, 'error': None}
+        results.append(result)
+        if selected:
+            jobs.append((result, selected, filename, variant.get('title') or default_title))
+        else:
+            result['error'] = 'no products match the filter'
+
+    image_cache.prefetch([product.get('imagem_url') for _, selected, _, _ in jobs for product in selected])
+
+    workers = max(1, min(workers or int(os.getenv('BATCH_WORKERS', str(os.cpu_count() or 1))), len(jobs) or 1))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=warm_up_worker,
+        initargs=(chunk_worker_share(workers),)
+    ) as pool:
+        futures = {
+            pool.submit(render_variant, selected, filename, title): result
+            for result, selected, filename, title in jobs
+        }
+        for future in as_completed(futures):
+            result = futures[future]
+            try:
+                result.update(future.result())
+                result['size_bytes'] = Path(result['output_path']).stat().st_size
+                logger.info(f"Variant '{result['name']}' rendered in {result['seconds']:.2f}s")
+            except Exception as e:
+                result['error'] = str(e)
+                logger.error(f"Variant '{result['name']}' failed: {str(e)}")
+
+    return results
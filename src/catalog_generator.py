@@ -3,14 +3,26 @@ PDF catalog generation engine using WeasyPrint and Jinja2.
 """
 
 import os
+import shutil
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from typing import List, Dict, Any
 from pathlib import Path
 import jinja2
-import weasyprint
 from dotenv import load_dotenv
 
+from .image_cache import ImageCache
+from .image_processing import ImageOptimizer
+from .render_cache import RenderCache, hash_directory
+from .render_worker import RenderWorker
+from .storage import new_catalog_name, catalog_path, temporary_path
+
+DEFAULT_TITLE = "Catálogo JA Distribuidora"
+
 
 class CatalogGenerator:
     def __init__(self):
@@ -18,6 +30,19 @@ class CatalogGenerator:
         self.output_dir = Path(os.getenv('OUTPUT_DIR', './output'))
         self.template_dir = Path(os.getenv('TEMPLATE_DIR', './templates'))
         self.logger = logging.getLogger(__name__)
+        self.image_cache = ImageCache()
+        self.image_optimizer = ImageOptimizer(self.image_cache)
+        self.optimize_images = os.getenv('IMAGE_OPTIMIZE', 'true').lower() == 'true'
+        self.last_image_stats = None
+        self.render_worker = RenderWorker(self.template_dir)
+        self.render_cache = RenderCache() if os.getenv('RENDER_CACHE', 'true').lower() == 'true' else None
+        self.last_cache_hit = False
+        
+        # Chunked rendering for very large catalogs
+        self.chunk_threshold = int(os.getenv('RENDER_CHUNK_THRESHOLD', '300'))
+        self.cards_per_page = int(os.getenv('RENDER_CARDS_PER_PAGE', '6'))
+        self.first_page_cards = int(os.getenv('RENDER_FIRST_PAGE_CARDS', str(self.cards_per_page)))
+        self.chunk_pages = int(os.getenv('RENDER_CHUNK_PAGES', '8'))
         
         # Ensure output directory exists
         self.output_dir.mkdir(exist_ok=True)
@@ -32,13 +57,20 @@ class CatalogGenerator:
         self.jinja_env.filters['format_price'] = self._format_price
         self.jinja_env.filters['fallback_image'] = self._fallback_image
     
-    def generate_catalog(self, products: List[Dict[str, Any]], filename: str = None) -> str:
+    def generate_catalog(self, products: List[Dict[str, Any]], filename: str = None,
+                         title: str = DEFAULT_TITLE) -> str:
         """
         Generate PDF catalog from product data.
         
+        Identical inputs are served from the render cache instead of being
+        rendered again; the PDF is still written under the requested filename.
+        The file is written to a temporary name and renamed into place, so a
+        partially written PDF is never visible.
+        
         Args:
             products: List of product dictionaries
             filename: Optional custom filename for the PDF
+            title: Catalog title
             
         Returns:
             Path to the generated PDF file
@@ -48,35 +80,80 @@ class CatalogGenerator:
         
         # Generate filename if not provided
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"catalogo_ja_distribuidora_{timestamp}.pdf"
+            filename = new_catalog_name()
         
         # Ensure filename has .pdf extension
         if not filename.endswith('.pdf'):
             filename += '.pdf'
         
-        output_path = self.output_dir / filename
+        output_path = catalog_path(self.output_dir, filename)
+        if not output_path.resolve().is_relative_to(self.output_dir.resolve()):
+            raise ValueError(f"Filename resolves outside the output directory: {filename}")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temporary_path(output_path)
         
         try:
-            # Render HTML template
-            html_content = self._render_template(products)
+            # Download all product images concurrently before layout starts
+            image_urls = [product.get('imagem_url') for product in products]
+            image_versions = self.image_cache.prefetch(image_urls)
+            
+            # Serve identical catalogs from the render cache
+            self.last_cache_hit = False
+            self.last_image_stats = None
+            cache_key = None
+            if self.render_cache:
+                cache_key = self.render_cache.key(
+                    products, title, image_versions,
+                    template_hash=hash_directory(self.template_dir),
+                    render_options=self._render_options()
+                )
+                if self.render_cache.materialize(cache_key, tmp_path):
+                    os.replace(tmp_path, output_path)
+                    self.last_cache_hit = True
+                    self.logger.info(f"Catalog served from render cache: {output_path}")
+                    return str(output_path)
+            
+            if self.optimize_images:
+                self.last_image_stats = self.image_optimizer.prepare(image_urls)
+            
+            if len(products) > self.chunk_threshold:
+                self._generate_chunked_pdf(products, title, tmp_path)
+            else:
+                # Render HTML template
+                html_content = self._render_template(products, title)
+                
+                # Generate PDF
+                self._generate_pdf(html_content, tmp_path)
+            
+            if cache_key:
+                self.render_cache.put(cache_key, tmp_path)
             
-            # Generate PDF
-            self._generate_pdf(html_content, output_path)
+            os.replace(tmp_path, output_path)
             
             self.logger.info(f"Catalog generated successfully: {output_path}")
             return str(output_path)
             
         except Exception as e:
+            tmp_path.unlink(missing_ok=True)
             self.logger.error(f"Error generating catalog: {str(e)}")
             raise
     
-    def _render_template(self, products: List[Dict[str, Any]]) -> str:
+    def _render_options(self) -> Dict[str, Any]:
+        """Generator settings that change the rendered output."""
+        if not self.optimize_images:
+            return {'images': 'original'}
+        return {'images': self.image_optimizer.variant_key('')}
+    
+    def _render_template(self, products: List[Dict[str, Any]], title: str = DEFAULT_TITLE,
+                         **layout) -> str:
         """
         Render HTML template with product data.
         
         Args:
             products: List of product dictionaries
+            title: Catalog title
+            **layout: Chunk layout overrides (product_pages, show_header,
+                show_footer, page_offset, total_products, generation_date)
             
         Returns:
             Rendered HTML string
@@ -87,9 +164,17 @@ class CatalogGenerator:
             # Prepare template context
             context = {
                 'products': products,
+                'title': title,
                 'generation_date': datetime.now().strftime("%d/%m/%Y %H:%M"),
-                'total_products': len(products)
+                'total_products': len(products),
+                'product_pages': [products],
+                'show_header': True,
+                'show_footer': True,
+                'page_offset': 0,
+                # The stylesheet is preloaded by the render worker
+                'link_stylesheet': False
             }
+            context.update(layout)
             
             return template.render(**context)
             
@@ -108,16 +193,108 @@ class CatalogGenerator:
             output_path: Path where PDF should be saved
         """
         try:
-            # Create HTML document
-            html_doc = weasyprint.HTML(string=html_content, base_url=str(self.template_dir))
-            
-            # Generate PDF with A4 page size
-            html_doc.write_pdf(str(output_path))
+            self.render_worker.write_pdf(
+                html_content,
+                output_path,
+                url_fetcher=self.image_optimizer.url_fetcher if self.optimize_images else self.image_cache.url_fetcher
+            )
             
         except Exception as e:
             self.logger.error(f"Error generating PDF: {str(e)}")
             raise
     
+    def _paginate(self, products: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split products into pages of cards, with a smaller first page for the header."""
+        pages = [products[:self.first_page_cards]]
+        for start in range(self.first_page_cards, len(products), self.cards_per_page):
+            pages.append(products[start:start + self.cards_per_page])
+        return pages
+    
+    def _generate_chunked_pdf(self, products: List[Dict[str, Any]], title: str, output_path: Path) -> None:
+        """
+        Render a large catalog as page-aligned chunks in parallel processes and merge them.
+        
+        Each chunk holds whole pages (one grid per page with forced page
+        breaks), and every chunk continues the page counter where the
+        previous one stopped. Offsets are first assumed to be one sheet per
+        grid page; if a chunk turns out longer (a grid page spilling onto a
+        second sheet), the chunks after it are rendered again with offsets
+        taken from the real page counts. The header is only rendered in the
+        first chunk and the footer in the last one.
+        
+        Args:
+            products: List of product dictionaries
+            title: Catalog title
+            output_path: Path where the merged PDF should be saved
+        """
+        pages = self._paginate(products)
+        chunks = [pages[i:i + self.chunk_pages] for i in range(0, len(pages), self.chunk_pages)]
+        generation_date = datetime.now().strftime("%d/%m/%Y %H:%M")
+        
+        chunk_dir = output_path.parent / f".{output_path.stem}.chunks"
+        chunk_dir.mkdir(exist_ok=True)
+        
+        def render_html(index: int, page_offset: int) -> str:
+            return self._render_template(
+                [product for page in chunks[index] for product in page],
+                title,
+                product_pages=chunks[index],
+                show_header=index == 0,
+                show_footer=index == len(chunks) - 1,
+                page_offset=page_offset,
+                total_products=len(products),
+                generation_date=generation_date
+            )
+        
+        try:
+            chunk_paths = [str(chunk_dir / f"{index:04d}.pdf") for index in range(len(chunks))]
+            offsets = []
+            page_offset = 0
+            for chunk_pages in chunks:
+                offsets.append(page_offset)
+                page_offset += len(chunk_pages)
+            
+            self.logger.info(f"Rendering {len(products)} products as {len(chunks)} chunks of {self.chunk_pages} pages")
+            _render_chunks([render_html(index, offset) for index, offset in enumerate(offsets)], chunk_paths)
+            
+            # Chunks rendered with a wrong offset are re-rendered; their own
+            # page count does not depend on the offset
+            stale = []
+            page_offset = 0
+            for index, chunk_path in enumerate(chunk_paths):
+                if page_offset != offsets[index]:
+                    stale.append(index)
+                    offsets[index] = page_offset
+                page_offset += _page_count(chunk_path)
+            if stale:
+                self.logger.info(f"Re-rendering {len(stale)} chunks with corrected page numbers")
+                _render_chunks(
+                    [render_html(index, offsets[index]) for index in stale],
+                    [chunk_paths[index] for index in stale]
+                )
+            
+            self._merge_pdfs(chunk_paths, output_path)
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+    
+    def _merge_pdfs(self, chunk_paths: List[str], output_path: Path) -> None:
+        """
+        Concatenate chunk PDFs, deduplicating identical objects.
+        
+        The logo and cached images produce byte-identical image streams in
+        every chunk, so they are stored once in the merged file. Font subsets
+        differ per chunk and are kept as they are.
+        """
+        from pypdf import PdfWriter
+        
+        writer = PdfWriter()
+        for chunk_path in chunk_paths:
+            writer.append(chunk_path, import_outline=False)
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        
+        with open(output_path, 'wb') as f:
+            writer.write(f)
+    
     def _format_price(self, price: float) -> str:
         """
         Format price as Brazilian Real currency.
@@ -147,4 +324,124 @@ class CatalogGenerator:
             # Return a simple data URL for a gray placeholder
             return "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='120' height='120' viewBox='0 0 120 120'%3E%3Crect width='120' height='120' fill='%23f0f0f0'/%3E%3Ctext x='60' y='60' text-anchor='middle' dy='0.35em' fill='%23999' font-family='Arial' font-size='12'%3ESem imagem%3C/text%3E%3C/svg%3E"
         
-        return image_url
\ No newline at end of file
+        return image_url
+
+# Per-process generator used by render pool workers
+_worker_generator = None
+
+# Process pool for chunked rendering, created on first use
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
+
+# This process's share of the chunk process budget, set by the pool initializer
+_chunk_workers = None
+
+
+def _get_worker_generator() -> CatalogGenerator:
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = CatalogGenerator()
+    return _worker_generator
+
+
+def chunk_worker_share(render_workers: int) -> int:
+    """
+    Chunk processes each of ``render_workers`` rendering processes may start.
+    
+    RENDER_CHUNK_WORKERS is the budget for the whole process tree, split
+    between the render pool workers (every one of them has its own chunk
+    pool), so large catalogs rendered side by side cannot multiply the
+    number of WeasyPrint processes.
+    """
+    budget = int(os.getenv('RENDER_CHUNK_WORKERS', '2'))
+    return max(1, budget // max(1, render_workers))
+
+
+def warm_up_worker(chunk_workers: int = None) -> None:
+    """
+    Process pool initializer: load render resources before the first job arrives.
+    
+    Args:
+        chunk_workers: This worker's share of the chunk process budget
+            (see chunk_worker_share)
+    """
+    global _chunk_workers
+    if chunk_workers:
+        _chunk_workers = chunk_workers
+    _get_worker_generator().render_worker.ensure_loaded()
+
+
+def _get_chunk_pool() -> ProcessPoolExecutor:
+    """Process pool for chunk rendering; workers are recycled to bound peak memory."""
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            _chunk_pool = ProcessPoolExecutor(
+                max_workers=_chunk_workers or chunk_worker_share(1),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up_worker,
+                max_tasks_per_child=int(os.getenv('RENDER_CHUNK_TASKS_PER_CHILD', '20'))
+            )
+        return _chunk_pool
+
+
+def _render_chunks(html_chunks: List[str], chunk_paths: List[str]) -> None:
+    """
+    Render chunks in the chunk pool.
+    
+    A pool broken by a dead worker (OOM kill, crash) is replaced and the
+    chunks are tried once more.
+    """
+    global _chunk_pool
+    for attempt in range(2):
+        pool = _get_chunk_pool()
+        try:
+            list(pool.map(render_chunk, html_chunks, chunk_paths))
+            return
+        except BrokenProcessPool:
+            with _chunk_pool_lock:
+                if _chunk_pool is pool:
+                    _chunk_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            logging.getLogger(__name__).warning("Chunk pool broke; starting a new one")
+            if attempt:
+                raise
+
+
+def _page_count(pdf_path: str) -> int:
+    from pypdf import PdfReader
+    
+    return len(PdfReader(pdf_path).pages)
+
+
+def render_chunk(html_content: str, output_path: str) -> str:
+    """
+    Render one chunk of a large catalog in a worker process.
+    
+    Args:
+        html_content: Rendered HTML for the chunk
+        output_path: Path where the chunk PDF should be saved
+        
+    Returns:
+        Path to the chunk PDF
+    """
+    _get_worker_generator()._generate_pdf(html_content, Path(output_path))
+    return output_path
+
+
+def render_catalog(products: List[Dict[str, Any]], filename: str = None, title: str = DEFAULT_TITLE) -> str:
+    """
+    Render a catalog in a worker process.
+    
+    Module-level so it can be pickled for a ProcessPoolExecutor; the
+    CatalogGenerator is created once per worker process and reused.
+    
+    Args:
+        products: List of product dictionaries
+        filename: Optional custom filename for the PDF
+        title: Catalog title
+        
+    Returns:
+        Path to the generated PDF file
+    """
+    return _get_worker_generator().generate_catalog(products, filename, title)
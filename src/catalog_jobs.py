@@ -0,0 +1,277 @@
+"""
+Asynchronous catalog generation jobs: a bounded queue drained by a pool of
+worker tasks, with per-user concurrency limits.
+"""
+
+import os
+import uuid
+import asyncio
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+from .storage import new_catalog_name
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no free slots."""
+
+
+class UserJobLimitError(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class CatalogJob(BaseModel):
+    id: str
+    owner: str
+    status: str = "queued"  # "queued", "rendering", "done" or "failed"
+    title: str
+    product_count: int
+    file_name: str
+    file_path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "rendering")
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Seconds spent queued and rendering (None for stages not reached)."""
+        queued_until = self.started_at or datetime.now()
+        rendering = None
+        if self.started_at:
+            rendering = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+        return {
+            'queued_seconds': round((queued_until - self.created_at).total_seconds(), 3),
+            'rendering_seconds': round(rendering, 3) if rendering is not None else None,
+        }
+
+
+JOB_FIELDS = (
+    'id', 'owner', 'status', 'title', 'product_count', 'file_name', 'file_path', 'error',
+    'created_at', 'started_at', 'finished_at',
+)
+JOB_COLUMNS = ', '.join(JOB_FIELDS)
+JOB_PLACEHOLDERS = ', '.join('?' * len(JOB_FIELDS))
+
+# Renders a job's products into job.file_name and returns the output path
+RenderFunc = Callable[['CatalogJob', List[Dict[str, Any]]], Awaitable[str]]
+
+
+class CatalogJobQueue:
+    """
+    Bounded catalog job queue with a fixed pool of worker tasks.
+
+    Jobs run in the process that accepted them, but their records live in
+    a SQLite table (by default next to the catalog index in OUTPUT_DIR), so
+    with several API workers any of them can report a job's status and the
+    per-user limit counts the user's jobs in every worker.
+    """
+
+    def __init__(self, render: RenderFunc, workers: int = None, max_queue: int = None,
+                 per_user_limit: int = None, retention: int = None, db_path: str = None):
+        load_dotenv()
+        self.render = render
+        self.workers = workers or int(os.getenv('CATALOG_JOB_WORKERS', '2'))
+        self.max_queue = max_queue or int(os.getenv('CATALOG_JOB_QUEUE_SIZE', '50'))
+        self.per_user_limit = per_user_limit or int(os.getenv('CATALOG_JOBS_PER_USER', '2'))
+        self.retention = retention or int(os.getenv('CATALOG_JOB_RETENTION', '3600'))
+        self.db_path = Path(db_path or Path(os.getenv('OUTPUT_DIR', './output')) / '.catalogs.db')
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Completion events of the jobs this process is running
+        self._finished: Dict[str, asyncio.Event] = {}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._transaction() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS catalog_jobs (
+                    id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    product_count INTEGER NOT NULL,
+                    file_name TEXT NOT NULL,
+                    file_path TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_catalog_jobs_owner ON catalog_jobs (owner, status);
+            """)
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting in this process's queue."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self.logger.info(f"Catalog job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, owner: str, products: List[Dict[str, Any]], title: str,
+                     file_name: Optional[str] = None) -> CatalogJob:
+        """
+        Enqueue a catalog job.
+
+        Without an explicit file_name, a unique name derived from the job id
+        is used, so concurrent jobs never overwrite each other.
+
+        Raises:
+            UserJobLimitError: If the owner already has too many active jobs
+            QueueFullError: If the queue is full
+        """
+        if self._queue.full():
+            raise QueueFullError("Catalog queue is full, try again later")
+
+        job_id = uuid.uuid4().hex
+        created_at = datetime.now()
+        job = CatalogJob(
+            id=job_id,
+            owner=owner,
+            title=title,
+            product_count=len(products),
+            file_name=file_name or new_catalog_name(job_id, created_at),
+            created_at=created_at
+        )
+        await asyncio.to_thread(self._insert, job)
+        try:
+            self._queue.put_nowait((job, products))
+        except asyncio.QueueFull:
+            # Filled up by another request while the record was written
+            await asyncio.to_thread(self._delete, job.id)
+            raise QueueFullError("Catalog queue is full, try again later")
+
+        self._finished[job.id] = asyncio.Event()
+        self.logger.info(f"Queued catalog job {job.id} for {owner} ({len(products)} products)")
+        return job
+
+    async def get(self, job_id: str) -> Optional[CatalogJob]:
+        """A job submitted to any worker process, or None if unknown or expired."""
+        return await asyncio.to_thread(self._load, job_id)
+
+    async def wait(self, job_id: str) -> CatalogJob:
+        """Wait until a job submitted to this process is done or failed."""
+        finished = self._finished.get(job_id)
+        if finished is not None:
+            await finished.wait()
+        return await self.get(job_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job, products = await self._queue.get()
+            job.status = "rendering"
+            job.started_at = datetime.now()
+            try:
+                await asyncio.to_thread(self._save, job)
+                job.file_path = await self.render(job, products)
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self.logger.error(f"Catalog job {job.id} failed: {str(e)}")
+            finally:
+                job.finished_at = datetime.now()
+                try:
+                    await asyncio.to_thread(self._save, job)
+                except Exception as e:
+                    self.logger.error(f"Could not record catalog job {job.id}: {str(e)}")
+                self._finished.pop(job.id).set()
+                self._queue.task_done()
+
+            timings = job.timings()
+            self.logger.info(
+                f"Catalog job {job.id} {job.status} (queued {timings['queued_seconds']}s, "
+                f"rendering {timings['rendering_seconds']}s)"
+            )
+
+    @staticmethod
+    def _row(job: CatalogJob) -> tuple:
+        return (
+            job.id, job.owner, job.status, job.title, job.product_count, job.file_name, job.file_path, job.error,
+            job.created_at.isoformat(),
+            job.started_at.isoformat() if job.started_at else None,
+            job.finished_at.isoformat() if job.finished_at else None,
+        )
+
+    def _insert(self, job: CatalogJob) -> None:
+        """Record a new job, enforcing the per-user limit across worker processes."""
+        self._prune()
+        with self._transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT COUNT(*) FROM catalog_jobs WHERE owner = ? AND status IN ('queued', 'rendering')",
+                (job.owner,)
+            ).fetchone()[0]
+            if active >= self.per_user_limit:
+                raise UserJobLimitError(f"User already has {active} catalog jobs in progress")
+            conn.execute(f"INSERT INTO catalog_jobs ({JOB_COLUMNS}) VALUES ({JOB_PLACEHOLDERS})", self._row(job))
+
+    def _save(self, job: CatalogJob) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO catalog_jobs ({JOB_COLUMNS}) VALUES ({JOB_PLACEHOLDERS})",
+                self._row(job)
+            )
+
+    def _delete(self, job_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM catalog_jobs WHERE id = ?", (job_id,))
+
+    def _load(self, job_id: str) -> Optional[CatalogJob]:
+        with self._transaction() as conn:
+            row = conn.execute(f"SELECT {JOB_COLUMNS} FROM catalog_jobs WHERE id = ?", (job_id,)).fetchone()
+        return CatalogJob(**dict(zip(JOB_FIELDS, row))) if row else None
+
+    def _prune(self) -> None:
+        """
+        Forget finished jobs older than the retention period.
+
+        Jobs still queued or rendering after that long belonged to a worker
+        process that died; they are marked failed so they stop counting
+        against their owner's limit.
+        """
+        cutoff = (datetime.now() - timedelta(seconds=self.retention)).isoformat()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE catalog_jobs SET status = 'failed', error = 'Abandoned by its worker process', finished_at = ? "
+                "WHERE status IN ('queued', 'rendering') AND created_at < ?",
+                (datetime.now().isoformat(), cutoff)
+            )
+            conn.execute("DELETE FROM catalog_jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
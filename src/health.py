@@ -0,0 +1,115 @@
+"""
+Liveness, readiness and background deep health checks for the API server.
+"""
+
+import os
+import time
+import shutil
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+from .product_cache import ProductCache
+from .catalog_jobs import CatalogJobQueue
+from .workers import render_pool_state
+
+
+class HealthMonitor:
+    """
+    Answers readiness probes from state the server already holds (product
+    cache age, render pool, output disk space, job queue depth), so probes
+    never touch Notion.
+
+    The optional deep check (e.g. a Notion round trip) runs in the
+    background at most once per ``deep_check_interval`` seconds and its
+    last result is published for /api/health.
+    """
+
+    def __init__(self, product_cache: ProductCache, catalog_jobs: CatalogJobQueue, output_dir: Path,
+                 deep_check: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+                 deep_check_interval: Optional[float] = None):
+        load_dotenv()
+        self.product_cache = product_cache
+        self.catalog_jobs = catalog_jobs
+        self.output_dir = Path(output_dir)
+        self.deep_check = deep_check
+        self.deep_check_interval = deep_check_interval if deep_check_interval is not None else \
+            float(os.getenv('HEALTH_DEEP_CHECK_INTERVAL', '300'))
+        self.min_free_bytes = int(float(os.getenv('HEALTH_MIN_FREE_DISK_MB', '200')) * 1024 * 1024)
+        self.max_product_age = float(os.getenv('HEALTH_MAX_PRODUCT_AGE', '3600'))
+        self.logger = logging.getLogger(__name__)
+
+        self.deep_result: Dict[str, Any] = {'status': 'unknown', 'checked_at': None}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background deep check loop (disabled when the interval is 0)."""
+        if self.deep_check and self.deep_check_interval > 0:
+            self._task = asyncio.create_task(self._run_deep_checks())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Cached dependency status.
+
+        Returns:
+            Dictionary with an overall 'ready' flag and one entry per dependency
+        """
+        age = self.product_cache.age
+        fallback_error = self.product_cache.fallback_error
+        products = {
+            # Last-known-good products still let the server answer requests
+            'ok': age is not None or fallback_error is not None,
+            'last_sync_age_seconds': round(age, 1) if age is not None else None,
+            'stale': fallback_error is not None or (age is not None and age > self.max_product_age),
+            'fallback_error': fallback_error,
+            'cached_products': self.product_cache.stats()['cached_products'],
+        }
+
+        pool = render_pool_state()
+        pool['ok'] = not pool['broken']
+
+        usage = shutil.disk_usage(self.output_dir)
+        disk = {
+            'ok': usage.free >= self.min_free_bytes,
+            'free_bytes': usage.free,
+            'total_bytes': usage.total,
+        }
+
+        queue = {
+            'ok': self.catalog_jobs.depth < self.catalog_jobs.max_queue,
+            'depth': self.catalog_jobs.depth,
+            'max_depth': self.catalog_jobs.max_queue,
+        }
+
+        return {
+            'ready': all(check['ok'] for check in (products, pool, disk, queue)),
+            'products': products,
+            'render_pool': pool,
+            'disk': disk,
+            'queue': queue,
+            'deep_check': self.deep_result,
+            'timestamp': datetime.now().isoformat(),
+        }
+
+    async def _run_deep_checks(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                details = await self.deep_check()
+                self.deep_result = {'status': 'ok', **details}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Deep health check failed: {str(e)}")
+                self.deep_result = {'status': 'error', 'error': str(e)}
+            self.deep_result['checked_at'] = datetime.now().isoformat()
+            self.deep_result['duration_seconds'] = round(time.monotonic() - started, 3)
+            await asyncio.sleep(self.deep_check_interval)
@@ -0,0 +1,159 @@
+"""
+HTTP helpers for serving files with strong ETags, conditional GET and
+byte-range requests.
+"""
+
+import os
+import hashlib
+import functools
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+# Generated files never change under the same name
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+CHUNK_SIZE = 64 * 1024
+
+
+@functools.lru_cache(maxsize=1024)
+def _content_hash(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(path: Path) -> str:
+    """
+    Strong ETag derived from the file's content hash.
+
+    Hashes are memoized per (path, mtime, size), so a file is only read
+    once unless it changes.
+    """
+    stat = os.stat(path)
+    return f'"{_content_hash(str(path), stat.st_mtime_ns, stat.st_size)}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match / If-Range header value against an ETag."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in header.split(','))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range.
+
+    Args:
+        header: Range header value
+        size: File size in bytes
+
+    Returns:
+        Inclusive (start, end) or None when the whole file should be sent
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+
+    ranges = header[len('bytes='):].split(',')
+    if len(ranges) != 1:
+        # Multipart ranges are not supported; fall back to the full body
+        return None
+
+    start_text, _, end_text = ranges[0].strip().partition('-')
+    try:
+        if start_text == '':
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+
+    if start >= size or start > end:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size - 1)
+
+
+def _iter_file(path: Path, start: int, end: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request: Request, path: Path, filename: str, media_type: str,
+                  cache_control: str = IMMUTABLE_CACHE_CONTROL,
+                  background: Optional[BackgroundTask] = None) -> Response:
+    """
+    Serve a file honouring If-None-Match, Range and If-Range.
+
+    Args:
+        request: Incoming request
+        path: File to serve
+        filename: Download filename for Content-Disposition
+        media_type: Content type
+        cache_control: Cache-Control header value
+        background: Task to run once the response has been sent
+
+    Returns:
+        200, 206, 304 or 416 response
+    """
+    size = os.stat(path).st_size
+    etag = file_etag(path)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': f'attachment; filename="{filename}"',
+    }
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers, background=background)
+
+    byte_range = None
+    if_range = request.headers.get('if-range')
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('range'), size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, 'Content-Range': f'bytes */{size}'},
+                background=background
+            )
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    headers['Content-Length'] = str(end - start + 1)
+    return StreamingResponse(
+        _iter_file(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+        background=background
+    )
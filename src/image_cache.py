@@ -0,0 +1,235 @@
+"""
+Content-addressed on-disk image cache and concurrent prefetcher used as the
+WeasyPrint url_fetcher for catalog rendering.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import mimetypes
+import threading
+import urllib.request
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from .storage import temporary_path
+
+
+def image_cache_key(url: str) -> str:
+    """
+    Build a cache key that is stable across URL re-signing.
+
+    Notion-hosted files are served from pre-signed S3 URLs whose query string
+    changes every time the page is fetched, while the path (workspace id,
+    file id and name) does not. For those, the query string is dropped.
+
+    Args:
+        url: Image URL
+
+    Returns:
+        Cache key string
+    """
+    parsed = urlparse(url)
+    signed = 'X-Amz-Signature' in parsed.query or 'X-Amz-Credential' in parsed.query
+    if signed or parsed.netloc.endswith('amazonaws.com') or parsed.netloc.endswith('notion.so'):
+        return f"{parsed.netloc}{parsed.path}"
+    return url
+
+
+class ImageCache:
+    """
+    On-disk image cache.
+
+    Image bytes are stored once per content hash under ``blobs/``; an SQLite
+    index maps stable URL keys to content hashes and tracks last access for
+    LRU eviction once the cache exceeds its size budget.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        load_dotenv()
+        self.cache_dir = Path(cache_dir or os.getenv('IMAGE_CACHE_DIR', './cache/images'))
+        self.max_bytes = max_bytes or int(float(os.getenv('IMAGE_CACHE_MAX_MB', '500')) * 1024 * 1024)
+        self.concurrency = int(os.getenv('IMAGE_PREFETCH_CONCURRENCY', '8'))
+        self.timeout = float(os.getenv('IMAGE_FETCH_TIMEOUT', '15'))
+        self.logger = logging.getLogger(__name__)
+
+        self.blob_dir = self.cache_dir / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / 'index.db'
+        self._write_lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._transaction() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS keys (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    mime_type TEXT
+                );
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs (last_access);
+                CREATE INDEX IF NOT EXISTS idx_keys_digest ON keys (digest);
+            """)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def lookup(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Find a cached image without downloading it.
+
+        Returns:
+            (content digest, mime type) or None on a miss
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT digest, mime_type FROM keys WHERE key = ?", (image_cache_key(url),)).fetchone()
+            if row is None or not self._blob_path(row[0]).exists():
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), row[0]))
+        return row[0], row[1]
+
+    def read(self, digest: str) -> bytes:
+        """Read cached image bytes by content digest."""
+        return self._blob_path(digest).read_bytes()
+
+    def fetch(self, url: str) -> Tuple[bytes, str, str]:
+        """
+        Return an image from the cache, downloading it on a miss.
+
+        Args:
+            url: Image URL
+
+        Returns:
+            (image bytes, mime type, content digest)
+        """
+        hit = self.lookup(url)
+        if hit:
+            digest, mime_type = hit
+            return self.read(digest), mime_type, digest
+
+        request = urllib.request.Request(url, headers={'User-Agent': 'JA-Distribuidora-Catalog'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read()
+            mime_type = response.headers.get_content_type() or mimetypes.guess_type(urlparse(url).path)[0]
+
+        digest = self.put(url, data, mime_type)
+        return data, mime_type, digest
+
+    def put(self, url: str, data: bytes, mime_type: Optional[str]) -> str:
+        """
+        Store image bytes for a URL.
+
+        Returns:
+            Content digest of the stored image
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        with self._write_lock:
+            if not blob_path.exists():
+                blob_path.parent.mkdir(exist_ok=True)
+                # Unique per writer: other processes may be storing the same digest
+                tmp_path = temporary_path(blob_path)
+                try:
+                    tmp_path.write_bytes(data)
+                    os.replace(tmp_path, blob_path)
+                except Exception:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO keys (key, digest, mime_type) VALUES (?, ?, ?)",
+                    (image_cache_key(url), digest, mime_type)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, size, last_access) VALUES (?, ?, ?)",
+                    (digest, len(data), time.time())
+                )
+            self._evict()
+
+        return digest
+
+    def prefetch(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Download all missing images concurrently.
+
+        Failures are logged and skipped; WeasyPrint falls back to the
+        template's placeholder for images that cannot be fetched.
+
+        Args:
+            urls: Image URLs (duplicates and empty values are ignored)
+
+        Returns:
+            Mapping of URL to content digest for every available image
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url and url.startswith(('http://', 'https://'))))
+        if not unique_urls:
+            return {}
+
+        started = time.time()
+        digests = {}
+
+        def fetch_one(url: str) -> None:
+            try:
+                digests[url] = self.fetch(url)[2]
+            except Exception as e:
+                self.logger.warning(f"Could not prefetch image {url}: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='image-prefetch') as executor:
+            list(executor.map(fetch_one, unique_urls))
+
+        self.logger.info(
+            f"Prefetched {len(digests)}/{len(unique_urls)} images in {time.time() - started:.2f}s"
+        )
+        return digests
+
+    def url_fetcher(self, url: str, timeout: int = 10, ssl_context=None) -> Dict[str, Any]:
+        """WeasyPrint url_fetcher serving remote images from the cache."""
+        if url.startswith(('http://', 'https://')):
+            data, mime_type, _ = self.fetch(url)
+            return {'string': data, 'mime_type': mime_type, 'redirected_url': url}
+
+        import weasyprint
+        return weasyprint.default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+    def _evict(self) -> None:
+        """Delete least recently used blobs until the cache fits its budget."""
+        with self._transaction() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for digest, size in conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._blob_path(digest).unlink(missing_ok=True)
+                conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                conn.execute("DELETE FROM keys WHERE digest = ?", (digest,))
+                total -= size
+
+            self.logger.info(f"Image cache evicted down to {total} bytes")
@@ -0,0 +1,141 @@
+"""
+Image preprocessing for catalog rendering: downscale product photos to the
+rendered card size, recompress and strip metadata.
+"""
+
+import io
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+from .image_cache import ImageCache
+
+# CSS reference pixel density
+CSS_DPI = 96
+
+
+class ImageOptimizer:
+    """
+    Produces print-sized variants of cached product images.
+
+    Each source image is cover-cropped to the card's image box (matching
+    ``object-fit: cover`` in styles.css) at the target DPI and re-encoded as a
+    progressive JPEG without EXIF/ICC metadata. Variants are stored in the
+    image cache keyed by source content hash and settings, so they are only
+    computed once per source image.
+    """
+
+    def __init__(self, image_cache: ImageCache, box_px: int = None, dpi: int = None, quality: int = None):
+        load_dotenv()
+        self.image_cache = image_cache
+        self.box_px = box_px or int(os.getenv('IMAGE_RENDER_BOX_PX', '120'))
+        self.dpi = dpi or int(os.getenv('IMAGE_TARGET_DPI', '150'))
+        self.quality = quality or int(os.getenv('IMAGE_JPEG_QUALITY', '80'))
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def target_size(self) -> int:
+        """Variant edge length in device pixels."""
+        return round(self.box_px * self.dpi / CSS_DPI)
+
+    def variant_key(self, digest: str) -> str:
+        return f"variant:{digest}:{self.target_size}:q{self.quality}"
+
+    def optimize(self, url: str) -> Tuple[bytes, str, int]:
+        """
+        Return the optimized variant for an image URL.
+
+        Args:
+            url: Source image URL
+
+        Returns:
+            (variant bytes, mime type, source size in bytes)
+        """
+        data, mime_type, digest = self.image_cache.fetch(url)
+        key = self.variant_key(digest)
+
+        cached = self.image_cache.lookup(key)
+        if cached:
+            return self.image_cache.read(cached[0]), cached[1], len(data)
+
+        try:
+            variant = self._transform(data)
+        except Exception as e:
+            # Formats Pillow cannot decode (e.g. SVG) are passed through untouched
+            self.logger.debug(f"Keeping original image {url}: {str(e)}")
+            return data, mime_type, len(data)
+
+        if len(variant) >= len(data):
+            variant, variant_mime = data, mime_type
+        else:
+            variant_mime = 'image/jpeg'
+        self.image_cache.put(key, variant, variant_mime)
+        return variant, variant_mime, len(data)
+
+    def prepare(self, urls: List[str]) -> Dict[str, int]:
+        """
+        Build variants for all images ahead of layout.
+
+        Args:
+            urls: Image URLs
+
+        Returns:
+            Stats with image count and total source/optimized sizes in bytes
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url and url.startswith(('http://', 'https://'))))
+        stats = {'images': 0, 'source_bytes': 0, 'optimized_bytes': 0}
+
+        def optimize_one(url: str) -> Optional[Tuple[int, int]]:
+            try:
+                variant, _, source_size = self.optimize(url)
+                return source_size, len(variant)
+            except Exception as e:
+                self.logger.warning(f"Could not optimize image {url}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='image-optimize') as executor:
+            for result in executor.map(optimize_one, unique_urls):
+                if result:
+                    stats['images'] += 1
+                    stats['source_bytes'] += result[0]
+                    stats['optimized_bytes'] += result[1]
+
+        return stats
+
+    def url_fetcher(self, url: str, timeout: int = 10, ssl_context=None) -> Dict[str, Any]:
+        """WeasyPrint url_fetcher serving optimized variants for remote images."""
+        if url.startswith(('http://', 'https://')):
+            data, mime_type, _ = self.optimize(url)
+            return {'string': data, 'mime_type': mime_type, 'redirected_url': url}
+        return self.image_cache.url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+    def _transform(self, data: bytes) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            # Apply EXIF orientation before the metadata is dropped
+            image = ImageOps.exif_transpose(image)
+
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            # Never upscale small sources
+            size = min(self.target_size, image.width, image.height)
+            image = ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+
+            output = io.BytesIO()
+            image.save(
+                output,
+                format='JPEG',
+                quality=self.quality,
+                optimize=True,
+                progressive=True,
+                dpi=(self.dpi, self.dpi)
+            )
+            return output.getvalue()
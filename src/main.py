@@ -7,13 +7,25 @@ Main CLI application for generating product catalogs from Notion database.
 
 import os
 import sys
+import time
 import argparse
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
-from notion_api import NotionClient
-from catalog_generator import CatalogGenerator
+# Allow running as a script (python src/main.py) as well as a module (python -m src.main)
+if __package__ in (None, ''):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'src'
+
+from .notion_api import NotionClient, NotionUnavailableError
+from .product_store import ProductSync
+from .catalog_generator import CatalogGenerator
+from .batch import load_manifest, run_batch
+from .watch import CatalogWatcher
+from .snapshot import ProductSnapshot
+from .storage import CatalogStorage
+from .utils import format_file_size
 
 
 def setup_logging(debug: bool = False) -> None:
@@ -53,6 +65,83 @@ def validate_environment() -> bool:
     return True
 
 
+def collect_output() -> None:
+    """Run one retention/quota garbage collection pass over the output directory."""
+    storage = CatalogStorage()
+    print(f"🧹 Collecting old catalogs in {storage.output_dir}...")
+    result = storage.collect()
+    print(
+        f"✅ Removed {result['removed']} files ({format_file_size(result['freed_bytes'])}), "
+        f"using {format_file_size(result['used_bytes'])} of {format_file_size(result['quota_bytes'])}"
+    )
+
+
+def load_products(args: argparse.Namespace, catalog_generator: CatalogGenerator) -> list:
+    """Load products from a snapshot, the local product store or Notion, per the CLI options."""
+    logger = logging.getLogger(__name__)
+    
+    if args.from_snapshot:
+        print(f"📦 Loading products from snapshot {args.from_snapshot}...")
+        snapshot = ProductSnapshot(args.from_snapshot)
+        snapshot.restore_images(catalog_generator.image_cache)
+        return snapshot.load_products()
+    
+    # Initialize clients
+    logger.info("Initializing Notion client...")
+    notion_client = NotionClient()
+    
+    # Fetch products from Notion
+    print("📊 Fetching products from Notion database...")
+    if args.incremental:
+        product_sync = ProductSync(notion_client)
+        try:
+            result = product_sync.sync()
+            print(f"🔄 {result['mode'].capitalize()} sync: {result['upserted']} updated, {result['removed']} removed")
+        except Exception as e:
+            if not product_sync.store.count():
+                raise
+            logger.warning(f"Incremental sync failed: {str(e)}")
+            print(f"⚠️  Sync failed ({str(e)}), using the {product_sync.store.count()} products from the last sync")
+        return product_sync.store.get_products()
+    try:
+        return notion_client.get_active_products()
+    except NotionUnavailableError as e:
+        logger.warning(f"Notion unavailable: {str(e)}")
+        print(f"⚠️  Notion unavailable ({str(e)}), using the {len(e.products)} products from the last successful fetch")
+        return e.products
+
+
+def generate_batch(manifest: dict, products: list, catalog_generator: CatalogGenerator) -> bool:
+    """
+    Render every variant in a manifest and print a timing/size report.
+    
+    Returns:
+        True if every variant was generated
+    """
+    print(f"🗂️  Rendering {len(manifest['variants'])} variants...")
+    
+    started = time.perf_counter()
+    results = run_batch(manifest, products, catalog_generator.image_cache)
+    elapsed = time.perf_counter() - started
+    
+    storage = CatalogStorage()
+    name_width = max(len(result['name']) for result in results)
+    print(f"\n{'Variant':<{name_width}}  {'Products':>8}  {'Time':>8}  {'Size':>10}  Output")
+    for result in results:
+        if result['error']:
+            print(f"{result['name']:<{name_width}}  {result['products']:>8}  {'-':>8}  {'-':>10}  ❌ {result['error']}")
+            continue
+        storage.register(result['output_path'], owner='batch')
+        print(
+            f"{result['name']:<{name_width}}  {result['products']:>8}  {result['seconds']:>7.2f}s  "
+            f"{format_file_size(result['size_bytes']):>10}  {result['output_path']}"
+        )
+    
+    failed = sum(1 for result in results if result['error'])
+    print(f"\n⏱️  {len(results) - failed}/{len(results)} variants generated in {elapsed:.2f}s")
+    return failed == 0
+
+
 def main():
     """Main application entry point."""
     parser = argparse.ArgumentParser(
@@ -60,6 +149,21 @@ def main():
         prog='JA Distribuidora Catalog Generator'
     )
     
+    parser.add_argument(
+        'command',
+        nargs='?',
+        default='generate',
+        choices=['generate', 'gc', 'batch'],
+        help='generate a catalog (default), batch to render every variant in a manifest, '
+             'or gc to clean up old catalogs in the output directory'
+    )
+    
+    parser.add_argument(
+        'manifest',
+        nargs='?',
+        help='YAML manifest describing catalog variants (batch only)'
+    )
+    
     parser.add_argument(
         '--output', '-o',
         type=str,
@@ -72,6 +176,39 @@ def main():
         help='Custom filename for the generated PDF'
     )
     
+    parser.add_argument(
+        '--incremental', '-i',
+        action='store_true',
+        help='Sync only changed products into the local product store before generating'
+    )
+    
+    parser.add_argument(
+        '--export-snapshot',
+        type=str,
+        metavar='PATH',
+        help='Save the fetched products and their images to a snapshot file instead of generating a catalog'
+    )
+    
+    parser.add_argument(
+        '--from-snapshot',
+        type=str,
+        metavar='PATH',
+        help='Generate from a snapshot file instead of Notion (no network access needed)'
+    )
+    
+    parser.add_argument(
+        '--watch', '-w',
+        action='store_true',
+        help='Keep running and regenerate catalogs (all products, or each manifest variant '
+             'with batch) when their products change, publishing them to <output>/latest/'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=float,
+        help='Seconds between Notion polls in watch mode (default: WATCH_INTERVAL or 60)'
+    )
+    
     parser.add_argument(
         '--debug', '-d',
         action='store_true',
@@ -85,27 +222,48 @@ def main():
     logger = logging.getLogger(__name__)
     
     try:
-        # Validate environment
-        if not validate_environment():
-            sys.exit(1)
-        
         # Override output directory if specified
         if args.output:
             os.environ['OUTPUT_DIR'] = args.output
             Path(args.output).mkdir(parents=True, exist_ok=True)
         
-        print("🚀 Starting catalog generation...")
+        if args.command == 'gc':
+            collect_output()
+            return
+        
+        manifest = None
+        if args.command == 'batch':
+            if not args.manifest:
+                parser.error('batch requires a manifest file')
+            manifest = load_manifest(args.manifest)
+        
+        if args.watch and args.from_snapshot:
+            parser.error('--watch polls Notion and cannot be combined with --from-snapshot')
         
-        # Initialize clients
-        logger.info("Initializing Notion client...")
-        notion_client = NotionClient()
+        # Notion credentials are only needed when not working from a snapshot
+        if not args.from_snapshot and not validate_environment():
+            sys.exit(1)
+        
+        if args.watch:
+            catalog_generator = CatalogGenerator()
+            watcher = CatalogWatcher(
+                ProductSync(NotionClient()),
+                manifest or {'variants': [{'name': 'catalogo'}]},
+                catalog_generator.image_cache,
+                output_dir=catalog_generator.output_dir,
+                template_dir=catalog_generator.template_dir,
+                interval=args.interval
+            )
+            print(f"👀 Watching Notion for changes (latest catalogs in {watcher.latest_dir})...")
+            watcher.run_forever()
+            return
+        
+        print("🚀 Starting catalog generation...")
         
         logger.info("Initializing catalog generator...")
         catalog_generator = CatalogGenerator()
         
-        # Fetch products from Notion
-        print("📊 Fetching products from Notion database...")
-        products = notion_client.get_active_products()
+        products = load_products(args, catalog_generator)
         
         if not products:
             print("⚠️  No active products found in the database.")
@@ -114,10 +272,27 @@ def main():
         
         print(f"✅ Found {len(products)} active products")
         
+        if args.export_snapshot:
+            print(f"📦 Exporting snapshot to {args.export_snapshot}...")
+            summary = ProductSnapshot(args.export_snapshot).export(products, catalog_generator.image_cache)
+            print(
+                f"✅ Snapshot saved: {summary['products']} products, {summary['images']} images "
+                f"({format_file_size(summary['size_bytes'])})"
+            )
+            return
+        
+        if args.command == 'batch':
+            if not generate_batch(manifest, products, catalog_generator):
+                sys.exit(1)
+            return
+        
         # Generate catalog
         print("📄 Generating PDF catalog...")
         output_path = catalog_generator.generate_catalog(products, args.filename)
+        CatalogStorage().register(output_path, owner='cli')
         
+        if catalog_generator.last_cache_hit:
+            print("♻️  Identical catalog found in render cache, skipped rendering")
         print(f"🎉 Catalog generated successfully!")
         print(f"📁 Output file: {output_path}")
         
@@ -126,6 +301,14 @@ def main():
         size_mb = file_size / (1024 * 1024)
         print(f"📊 File size: {size_mb:.2f} MB")
         
+        image_stats = catalog_generator.last_image_stats
+        if image_stats and image_stats['images']:
+            print(
+                f"🖼️  Images ({image_stats['images']}): "
+                f"{format_file_size(image_stats['source_bytes'])} before → "
+                f"{format_file_size(image_stats['optimized_bytes'])} after optimization"
+            )
+        
     except KeyboardInterrupt:
         print("\n⚠️  Operation cancelled by user")
         sys.exit(1)
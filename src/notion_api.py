@@ -3,11 +3,153 @@ Notion API client for querying the Acessorios database.
 """
 
 import os
+import json
+import time
+import queue
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from notion_client import Client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator, Tuple
+import httpx
+from notion_client import Client, AsyncClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
 from dotenv import load_dotenv
 
+from .rate_limit import TokenBucket, CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+# Maximum page size accepted by the Notion query endpoint
+NOTION_PAGE_SIZE = 100
+
+# Responses worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUSES = {409, 429, 500, 502, 503, 504}
+
+ACTIVE_PRODUCTS_FILTER = {
+    "property": "Catálogo Ativo",
+    "checkbox": {
+        "equals": True
+    }
+}
+
+# A partition is a list of filter conditions AND-ed with the base filter.
+# Partitions passed to the fetch engine must be disjoint and, together,
+# cover the whole result set.
+Partition = List[Dict[str, Any]]
+
+# Partition condition applied to the fetched pages instead of being sent to
+# Notion, whose text filters cannot express "does not start with"
+SKU_NOT_STARTING_WITH = '_sku_does_not_start_with'
+
+
+def created_time_partitions(boundaries: List[str]) -> List[Partition]:
+    """
+    Split the database into disjoint created_time ranges.
+    
+    Args:
+        boundaries: Sorted ISO 8601 dates/timestamps used as range limits
+        
+    Returns:
+        len(boundaries) + 1 partitions covering every page
+    """
+    if not boundaries:
+        return [[]]
+    
+    partitions = [[{"timestamp": "created_time", "created_time": {"before": boundaries[0]}}]]
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        partitions.append([
+            {"timestamp": "created_time", "created_time": {"on_or_after": lower}},
+            {"timestamp": "created_time", "created_time": {"before": upper}},
+        ])
+    partitions.append([{"timestamp": "created_time", "created_time": {"on_or_after": boundaries[-1]}}])
+    return partitions
+
+
+def sku_prefix_partitions(prefixes: List[str]) -> List[Partition]:
+    """
+    Split the database by SKU prefix.
+    
+    The prefixes must not overlap (e.g. "A" and "AB"). Products without a
+    SKU get their own partition, and a catch-all partition picks up SKUs
+    matching none of the prefixes. Notion cannot filter those out, so the
+    catch-all reads every page with a SKU and keeps only the unmatched ones;
+    created_time partitions (NOTION_FETCH_PARTITION_DATES) need no such pass.
+    
+    Args:
+        prefixes: SKU prefixes, one partition each
+        
+    Returns:
+        List of partitions
+    """
+    partitions = [
+        [{"property": "SKU", "rich_text": {"starts_with": prefix}}]
+        for prefix in prefixes
+    ]
+    partitions.append([{"property": "SKU", "rich_text": {"is_empty": True}}])
+    partitions.append([
+        {"property": "SKU", "rich_text": {"is_not_empty": True}},
+        {SKU_NOT_STARTING_WITH: list(prefixes)},
+    ])
+    return partitions
+
+
+def _partitions_from_env() -> List[Partition]:
+    """Build fetch partitions from NOTION_FETCH_PARTITION_* settings."""
+    boundaries = [b.strip() for b in os.getenv('NOTION_FETCH_PARTITION_DATES', '').split(',') if b.strip()]
+    if boundaries:
+        return created_time_partitions(sorted(boundaries))
+    
+    prefixes = [p.strip() for p in os.getenv('NOTION_FETCH_PARTITION_SKU_PREFIXES', '').split(',') if p.strip()]
+    if prefixes:
+        return sku_prefix_partitions(prefixes)
+    
+    return [[]]
+
+
+_rate_limiter: Optional[TokenBucket] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """
+    Token bucket shared by every NotionClient in the process.
+    
+    Notion allows about 3 requests per second per integration. Set
+    NOTION_RATE_LIMIT_STATE to a file path to share the budget across
+    processes (API server and CLI runs) as well.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket(
+                rate=float(os.getenv('NOTION_RATE_LIMIT', '3')),
+                capacity=float(os.getenv('NOTION_RATE_LIMIT_BURST', '3')),
+                state_path=os.getenv('NOTION_RATE_LIMIT_STATE') or None,
+                name='notion'
+            )
+        return _rate_limiter
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class NotionUnavailableError(Exception):
+    """
+    Raised when Notion cannot be queried but a last-known-good product list
+    exists. ``products`` holds that list, so callers can keep serving it
+    while still treating the load as failed (no fresh sync time, an error
+    counted, health reported as degraded).
+    """
+
+    def __init__(self, message: str, products: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.products = products
+
 
 class NotionClient:
     def __init__(self):
@@ -21,38 +163,372 @@ class NotionClient:
             raise ValueError("NOTION_DATABASE_ID environment variable is required")
         
         self.client = Client(auth=self.api_token)
+        self.async_client = AsyncClient(auth=self.api_token)
         self.logger = logging.getLogger(__name__)
+        
+        # Fetch engine settings
+        self.fetch_concurrency = max(1, int(os.getenv('NOTION_FETCH_CONCURRENCY', '3')))
+        self.partitions = _partitions_from_env()
+        
+        # Request scheduling: shared rate limit, retries and circuit breaker
+        self.rate_limiter = get_rate_limiter()
+        self.max_retries = int(os.getenv('NOTION_MAX_RETRIES', '5'))
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('NOTION_CIRCUIT_FAILURES', '5')),
+            reset_timeout=float(os.getenv('NOTION_CIRCUIT_RESET_SECONDS', '60')),
+            name='notion'
+        )
+        
+        # Last-known-good product list, served while the circuit is open
+        self.snapshot_path = Path(os.getenv('NOTION_LAST_GOOD_PATH', './data/notion_products.json'))
+        self._last_good: Optional[List[Dict[str, Any]]] = None
     
     def get_active_products(self) -> List[Dict[str, Any]]:
         """
         Query the Acessorios database for products where Catálogo Ativo is true.
         
+        Every page of results is fetched; partitions are fetched concurrently
+        and reassembled in partition order.
+        
         Returns:
             List of product data dictionaries
+            
+        Raises:
+            NotionUnavailableError: If Notion is unavailable and the
+                last-known-good products are available instead
         """
         try:
-            response = self.client.databases.query(
-                database_id=self.database_id,
-                filter={
-                    "property": "Catálogo Ativo",
-                    "checkbox": {
-                        "equals": True
-                    }
-                }
-            )
+            batches: Dict[int, List[Dict[str, Any]]] = {}
+            for index, pages in self._stream_partitions(ACTIVE_PRODUCTS_FILTER, self.partitions):
+                batches.setdefault(index, []).extend(self._extract_products(pages))
             
-            products = []
-            for page in response['results']:
-                product = self._extract_product_data(page)
-                if product:
-                    products.append(product)
+            products = [product for index in sorted(batches) for product in batches[index]]
             
-            self.logger.info(f"Retrieved {len(products)} active products from Notion")
-            return products
+        except Exception as e:
+            fallback = self._fallback_products(e)
+            if fallback is not None:
+                raise NotionUnavailableError(str(e), fallback) from e
+            self.logger.error(f"Error querying Notion database: {str(e)}")
+            raise
+        
+        self.logger.info(f"Retrieved {len(products)} active products from Notion")
+        self._save_snapshot(products)
+        return products
+    
+    async def aget_active_products(self) -> List[Dict[str, Any]]:
+        """
+        Async variant of get_active_products using the async Notion client.
+        
+        Partitions are fetched concurrently on the event loop, bounded by
+        NOTION_FETCH_CONCURRENCY, and reassembled in partition order.
+        
+        Returns:
+            List of product data dictionaries
+            
+        Raises:
+            NotionUnavailableError: As in get_active_products
+        """
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        
+        async def fetch(partition: Partition) -> List[Dict[str, Any]]:
+            async with semaphore:
+                products = []
+                async for pages in self.aquery_pages(self._partition_filter(ACTIVE_PRODUCTS_FILTER, partition)):
+                    products.extend(self._extract_products(self._partition_pages(partition, pages)))
+                return products
+        
+        try:
+            batches = await asyncio.gather(*(fetch(partition) for partition in self.partitions))
+            products = [product for batch in batches for product in batch]
             
         except Exception as e:
+            fallback = await asyncio.to_thread(self._fallback_products, e)
+            if fallback is not None:
+                raise NotionUnavailableError(str(e), fallback) from e
             self.logger.error(f"Error querying Notion database: {str(e)}")
             raise
+        
+        self.logger.info(f"Retrieved {len(products)} active products from Notion")
+        await asyncio.to_thread(self._save_snapshot, products)
+        return products
+    
+    def iter_product_pages(self, partitions: Optional[List[Partition]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream active products one Notion result page at a time.
+        
+        Pages are yielded as soon as they arrive, so with several partitions
+        the order across partitions is not deterministic.
+        
+        Args:
+            partitions: Disjoint filter partitions (defaults to the configured ones)
+            
+        Yields:
+            Lists of product data dictionaries
+        """
+        for _, pages in self._stream_partitions(ACTIVE_PRODUCTS_FILTER, partitions or self.partitions):
+            yield self._extract_products(pages)
+    
+    def iter_active_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream raw Notion pages of all active products using the configured partitions.
+        
+        Yields:
+            Lists of raw Notion page objects
+        """
+        for _, pages in self._stream_partitions(ACTIVE_PRODUCTS_FILTER, self.partitions):
+            yield pages
+    
+    def query_changed_pages(self, since: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream pages edited at or after a timestamp, active or not.
+        
+        Notion rounds last_edited_time to the minute, so the boundary minute is
+        always re-fetched; callers must apply changes idempotently.
+        
+        Args:
+            since: ISO 8601 timestamp (high-water mark)
+            
+        Yields:
+            Lists of raw Notion page objects
+        """
+        return self.query_pages(
+            filter={"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}},
+            sorts=[{"timestamp": "last_edited_time", "direction": "ascending"}]
+        )
+    
+    def is_active_page(self, page: Dict[str, Any]) -> bool:
+        """Check whether a page is a live product with Catálogo Ativo checked."""
+        if page.get('archived') or page.get('in_trash'):
+            return False
+        prop = page.get('properties', {}).get('Catálogo Ativo', {})
+        return prop.get('type') == 'checkbox' and bool(prop.get('checkbox'))
+    
+    def query_pages(self, filter: Optional[Dict[str, Any]] = None, **query_args) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Walk every result page of a database query by following next_cursor.
+        
+        Args:
+            filter: Notion filter object
+            **query_args: Extra arguments for databases.query (e.g. sorts)
+            
+        Yields:
+            Lists of raw Notion page objects
+        """
+        cursor = None
+        while True:
+            kwargs = dict(query_args, database_id=self.database_id, page_size=NOTION_PAGE_SIZE)
+            if filter:
+                kwargs['filter'] = filter
+            if cursor:
+                kwargs['start_cursor'] = cursor
+            
+            response = self._query_database(**kwargs)
+            yield response['results']
+            
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            cursor = response['next_cursor']
+    
+    async def aquery_pages(self, filter: Optional[Dict[str, Any]] = None, **query_args) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async variant of query_pages.
+        
+        Args:
+            filter: Notion filter object
+            **query_args: Extra arguments for databases.query (e.g. sorts)
+            
+        Yields:
+            Lists of raw Notion page objects
+        """
+        cursor = None
+        while True:
+            kwargs = dict(query_args, database_id=self.database_id, page_size=NOTION_PAGE_SIZE)
+            if filter:
+                kwargs['filter'] = filter
+            if cursor:
+                kwargs['start_cursor'] = cursor
+            
+            response = await self._aquery_database(**kwargs)
+            yield response['results']
+            
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            cursor = response['next_cursor']
+    
+    def _query_database(self, **kwargs) -> Dict[str, Any]:
+        """
+        Run one databases.query call through the request scheduler.
+        
+        Waits for the shared rate limit, retries rate-limited and transient
+        failures with backoff (honouring Retry-After) and fails fast while
+        the circuit breaker is open.
+        """
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            self.rate_limiter.acquire()
+            try:
+                response = self.client.databases.query(**kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self.circuit_breaker.record_success()
+            return response
+    
+    async def _aquery_database(self, **kwargs) -> Dict[str, Any]:
+        """Async variant of _query_database."""
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            await self.rate_limiter.aacquire()
+            try:
+                response = await self.async_client.databases.query(**kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.circuit_breaker.record_success()
+            return response
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decide how to handle a failed request.
+        
+        Returns:
+            Seconds to wait before retrying, or None to give up and re-raise
+        """
+        retry_after = None
+        if isinstance(error, HTTPResponseError):
+            if error.status not in RETRYABLE_STATUSES:
+                # Notion answered; the request itself is wrong
+                self.circuit_breaker.record_success()
+                return None
+            retry_after = _parse_retry_after(error.headers.get('retry-after'))
+        elif not isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+            return None
+        
+        if attempt >= self.max_retries or self.circuit_breaker.state == CircuitBreaker.HALF_OPEN:
+            # A half-open trial gets no retries: its failure reopens the circuit
+            self.circuit_breaker.record_failure()
+            return None
+        
+        delay = backoff_delay(attempt, retry_after=retry_after)
+        self.logger.warning(f"Notion request failed ({str(error)}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+    
+    def _fallback_products(self, error: Exception) -> Optional[List[Dict[str, Any]]]:
+        """Last-known-good products if Notion is unavailable (circuit not closed)."""
+        if not isinstance(error, CircuitOpenError) and self.circuit_breaker.state == CircuitBreaker.CLOSED:
+            return None
+        
+        if self._last_good is None and self.snapshot_path.exists():
+            try:
+                self._last_good = json.loads(self.snapshot_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not read product snapshot {self.snapshot_path}: {str(e)}")
+        
+        if self._last_good is None:
+            return None
+        self.logger.warning(
+            f"Notion unavailable ({str(error)}), serving {len(self._last_good)} products from last-known-good snapshot"
+        )
+        return list(self._last_good)
+    
+    def _save_snapshot(self, products: List[Dict[str, Any]]) -> None:
+        """Keep the latest product list in memory and on disk for fallback."""
+        self._last_good = products
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.tmp")
+            tmp_path.write_text(json.dumps(products, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write product snapshot {self.snapshot_path}: {str(e)}")
+    
+    def _stream_partitions(self, base_filter: Dict[str, Any],
+                           partitions: List[Partition]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Fetch partitions concurrently and yield (partition index, raw pages) per result page.
+        
+        Args:
+            base_filter: Filter applied to every partition
+            partitions: Disjoint filter partitions
+        """
+        if len(partitions) <= 1 or self.fetch_concurrency == 1:
+            for index, partition in enumerate(partitions):
+                for pages in self.query_pages(self._partition_filter(base_filter, partition)):
+                    yield index, self._partition_pages(partition, pages)
+            return
+        
+        results: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        done = object()
+        
+        def fetch(index: int, partition: Partition) -> None:
+            try:
+                for pages in self.query_pages(self._partition_filter(base_filter, partition)):
+                    if stop.is_set():
+                        break
+                    results.put((index, self._partition_pages(partition, pages)))
+            except Exception as e:
+                results.put((index, e))
+            finally:
+                results.put((index, done))
+        
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.fetch_concurrency, len(partitions)),
+            thread_name_prefix='notion-fetch'
+        )
+        try:
+            for index, partition in enumerate(partitions):
+                executor.submit(fetch, index, partition)
+            
+            remaining = len(partitions)
+            while remaining:
+                index, item = results.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield index, item
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _partition_filter(self, base_filter: Dict[str, Any], partition: Partition) -> Dict[str, Any]:
+        """Combine the base filter with a partition's Notion conditions."""
+        conditions = [condition for condition in partition if SKU_NOT_STARTING_WITH not in condition]
+        if not conditions:
+            return base_filter
+        return {"and": [base_filter] + conditions}
+    
+    def _partition_pages(self, partition: Partition, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply a partition's local conditions to a page of results."""
+        for condition in partition:
+            if SKU_NOT_STARTING_WITH in condition:
+                prefixes = tuple(condition[SKU_NOT_STARTING_WITH])
+                pages = [
+                    page for page in pages
+                    if not self._get_text_property(page.get('properties', {}).get('SKU', {})).startswith(prefixes)
+                ]
+        return pages
+    
+    def _extract_products(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract product data from a page of results, skipping invalid entries."""
+        products = []
+        for page in pages:
+            product = self._extract_product_data(page)
+            if product:
+                products.append(product)
+        return products
     
     def _extract_product_data(self, page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -92,6 +568,7 @@ class NotionClient:
                 return None
             
             return {
+                'id': page.get('id'),
                 'nome': nome,
                 'preco': preco,
                 'sku': sku or '',
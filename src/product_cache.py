@@ -0,0 +1,146 @@
+"""
+In-process product list cache with TTL, stale-while-revalidate and
+single-flight refreshes.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Callable, Awaitable, Optional
+from dotenv import load_dotenv
+
+from .notion_api import NotionUnavailableError
+
+
+class ProductCache:
+    """
+    Caches the active product list in front of the Notion loader.
+
+    - Within ``ttl`` seconds of the last load the cached list is served.
+    - Within the following ``stale_ttl`` seconds the stale list is served
+      immediately while a background refresh runs.
+    - Past that (or before the first load) callers wait for a refresh.
+
+    When the loader raises NotionUnavailableError the load counts as an
+    error and the cache keeps its last load time; the cached list (or, on
+    a cold start, the error's last-known-good list) is served and
+    ``fallback_error`` is set until the next successful load.
+
+    Concurrent refreshes are coalesced into a single upstream query.
+    Listeners registered with ``add_listener`` are called with every newly
+    loaded list (e.g. to keep a search index in sync).
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                 ttl: Optional[float] = None, stale_ttl: Optional[float] = None):
+        load_dotenv()
+        self.loader = loader
+        self.ttl = ttl if ttl is not None else float(os.getenv('PRODUCT_CACHE_TTL', '60'))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('PRODUCT_CACHE_STALE_TTL', '600'))
+        self.logger = logging.getLogger(__name__)
+
+        self._products: Optional[List[Dict[str, Any]]] = None
+        self._loaded_at: Optional[float] = None
+        self.fallback_error: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'coalesced': 0,
+            'errors': 0,
+        }
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful load, or None if never loaded."""
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """Call ``listener(products)`` after each successful load."""
+        self._listeners.append(listener)
+        if self._products is not None:
+            listener(self._products)
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """Return the product list, refreshing according to the cache policy."""
+        age = self.age
+        if age is not None and age < self.ttl:
+            self.counters['hits'] += 1
+            return self._products
+
+        if age is not None and age < self.ttl + self.stale_ttl:
+            self.counters['stale_hits'] += 1
+            self._start_refresh()
+            return self._products
+
+        self.counters['misses'] += 1
+        return await self._shared_refresh()
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """Force a reload from upstream (joins a refresh already in flight)."""
+        return await self._shared_refresh()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and state for monitoring."""
+        age = self.age
+        return {
+            **self.counters,
+            'cached_products': len(self._products) if self._products is not None else 0,
+            'age_seconds': round(age, 3) if age is not None else None,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'refreshing': self._refresh_task is not None,
+            'fallback_error': self.fallback_error,
+        }
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._load())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        else:
+            self.counters['coalesced'] += 1
+        return self._refresh_task
+
+    async def _shared_refresh(self) -> List[Dict[str, Any]]:
+        # Shield so a cancelled request does not cancel the refresh other callers wait on
+        return await asyncio.shield(self._start_refresh())
+
+    async def _load(self) -> List[Dict[str, Any]]:
+        self.counters['refreshes'] += 1
+        try:
+            products = await self.loader()
+        except NotionUnavailableError as e:
+            self.counters['errors'] += 1
+            self.fallback_error = str(e)
+            self.logger.error(f"Error refreshing product cache, serving last-known-good products: {str(e)}")
+            if self._products is not None:
+                return self._products
+            products = e.products
+        except Exception as e:
+            self.counters['errors'] += 1
+            self.logger.error(f"Error refreshing product cache: {str(e)}")
+            raise
+        else:
+            self._loaded_at = time.monotonic()
+            self.fallback_error = None
+            self.logger.info(f"Product cache refreshed with {len(products)} products")
+
+        self._products = products
+        for listener in self._listeners:
+            try:
+                listener(products)
+            except Exception as e:
+                self.logger.error(f"Product cache listener failed: {str(e)}")
+        return products
+
+    def _on_refresh_done(self, task: asyncio.Task) -> None:
+        self._refresh_task = None
+        # Mark background failures as retrieved; they were already logged in _load
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,291 @@
+"""
+In-memory search index over the active product list.
+"""
+
+import re
+import json
+import base64
+import bisect
+import logging
+import unicodedata
+from typing import Iterable, List, Dict, Any, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Fields that feed the lookup structures (name tokens and order, SKU and
+# barcode maps). Others, such as the price or the image URL that Notion
+# re-signs on every fetch, are read from the latest product dict.
+INDEXED_FIELDS = ('nome', 'sku', 'barcode')
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and strip accents ("Café" -> "cafe")."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def normalize_code(code: Any) -> str:
+    """Canonical form of a SKU or barcode: no whitespace, case-insensitive."""
+    return re.sub(r'\s+', '', str(code or '')).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def encode_cursor(sort_key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(sort_key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        name, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(name), str(key)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class ProductIndex:
+    """
+    Lookup structures over the products produced by NotionClient.
+
+    - exact SKU and barcode lookups via hash maps
+    - accent- and case-insensitive prefix search on name tokens
+    - price range filtering
+    - stable cursor pagination ordered by name
+
+    ``update`` diffs the new list against the indexed one by product id, so
+    only added, changed and removed products touch the token postings.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._tokens_by_key: Dict[str, List[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._by_sku: Dict[str, str] = {}
+        self._by_barcode: Dict[str, str] = {}
+        self._sorted: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    @staticmethod
+    def _key(product: Dict[str, Any]) -> str:
+        # Products from the local store and from Notion carry the page id;
+        # fall back to SKU/name for lists built elsewhere
+        if product.get('id'):
+            return product['id']
+        if product.get('sku'):
+            return f"sku:{product['sku']}"
+        return f"name:{product.get('nome')}"
+
+    def update(self, products: List[Dict[str, Any]]) -> None:
+        """
+        Bring the index in line with a new product list.
+
+        Calling it again with the same list object is a no-op.
+        """
+        if products is self._source:
+            return
+
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for product in products:
+            incoming[self._key(product)] = product
+
+        removed = [key for key in self._products if key not in incoming]
+        changed = [
+            key for key, product in incoming.items()
+            if self._fingerprints.get(key) != tuple(product.get(field) for field in INDEXED_FIELDS)
+        ]
+
+        for key in removed:
+            self._remove(key)
+        for key in changed:
+            if key in self._products:
+                self._remove(key)
+            self._add(key, incoming[key])
+        # Unchanged products may still be new dict objects; serve the latest ones
+        self._products.update(incoming)
+
+        if removed or changed:
+            self._vocabulary = sorted(self._postings)
+            self._sorted = sorted((normalize_text(p.get('nome')), key) for key, p in self._products.items())
+        self._source = products
+
+        if removed or changed:
+            self.logger.info(
+                f"Product index updated: {len(changed)} added/changed, {len(removed)} removed, "
+                f"{len(self._products)} total"
+            )
+
+    def by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
+        key = self._by_sku.get(normalize_code(sku))
+        return self._products.get(key) if key else None
+
+    def by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        key = self._by_barcode.get(normalize_code(barcode))
+        return self._products.get(key) if key else None
+
+    def lookup_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """Resolve a scanned code as a barcode first, then as a SKU."""
+        return self.by_barcode(code) or self.by_sku(code)
+
+    def lookup_batch(self, items: Iterable[Tuple[str, int]]) -> Dict[str, Any]:
+        """
+        Resolve a batch of scanned codes into order lines.
+
+        Repeated scans of the same product are merged into one line (in
+        first-scan order), as are repeated unknown codes.
+
+        Args:
+            items: (code, quantity) pairs; codes are barcodes or SKUs
+
+        Returns:
+            Dictionary with 'lines' (product, quantity, line_total),
+            'unmatched' (code, quantity) and the order 'total'
+        """
+        lines: Dict[str, Dict[str, Any]] = {}
+        unmatched: Dict[str, Dict[str, Any]] = {}
+
+        for code, quantity in items:
+            normalized = normalize_code(code)
+            key = self._by_barcode.get(normalized) or self._by_sku.get(normalized)
+            if key is None:
+                entry = unmatched.setdefault(normalized, {'code': code, 'quantity': 0})
+                entry['quantity'] += quantity
+                continue
+
+            line = lines.setdefault(key, {'product': self._products[key], 'codes': [], 'quantity': 0})
+            if code not in line['codes']:
+                line['codes'].append(code)
+            line['quantity'] += quantity
+
+        total = 0.0
+        for line in lines.values():
+            price = line['product'].get('preco')
+            line['line_total'] = round(price * line['quantity'], 2) if price is not None else None
+            total += line['line_total'] or 0.0
+
+        return {
+            'lines': list(lines.values()),
+            'unmatched': list(unmatched.values()),
+            'total': round(total, 2),
+        }
+
+    def search(self, q: Optional[str] = None, sku: Optional[str] = None, barcode: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Filter products; all given criteria must match.
+
+        Args:
+            q: Words matched as prefixes of name words, accent-insensitive
+            sku: Exact SKU
+            barcode: Exact barcode
+            min_price: Minimum price (inclusive)
+            max_price: Maximum price (inclusive)
+            limit: Page size (all matches if omitted)
+            cursor: Opaque cursor from a previous page
+
+        Returns:
+            Dictionary with 'products', 'total' and 'next_cursor'
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        candidates: Optional[Set[str]] = None
+
+        for code, mapping in ((sku, self._by_sku), (barcode, self._by_barcode)):
+            if code:
+                key = mapping.get(normalize_code(code))
+                candidates = {key} if key and (candidates is None or key in candidates) else set()
+
+        if q:
+            for token in tokenize(q):
+                matches = self._prefix_matches(token)
+                candidates = matches if candidates is None else candidates & matches
+
+        # Narrow queries (a scanned code, a rare word) only sort their own matches
+        if candidates is None:
+            ordered = self._sorted
+        else:
+            ordered = sorted((normalize_text(self._products[key].get('nome')), key) for key in candidates)
+        start = bisect.bisect_right(ordered, decode_cursor(cursor)) if cursor else 0
+
+        results = []
+        total = 0
+        next_cursor = None
+        for position, sort_key in enumerate(ordered):
+            key = sort_key[1]
+            if not self._price_matches(self._products[key], min_price, max_price):
+                continue
+            total += 1
+            if position < start:
+                continue
+            if limit is not None and len(results) >= limit:
+                # More matches follow: resume after the last returned product
+                if next_cursor is None and results:
+                    next_cursor = encode_cursor(results[-1])
+                continue
+            results.append(sort_key)
+
+        return {
+            'products': [self._products[key] for _, key in results],
+            'total': total,
+            'next_cursor': next_cursor,
+        }
+
+    @staticmethod
+    def _price_matches(product: Dict[str, Any], min_price: Optional[float], max_price: Optional[float]) -> bool:
+        if min_price is None and max_price is None:
+            return True
+        price = product.get('preco')
+        if price is None:
+            return False
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        matches: Set[str] = set()
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            matches |= self._postings[self._vocabulary[position]]
+            position += 1
+        return matches
+
+    def _add(self, key: str, product: Dict[str, Any]) -> None:
+        self._products[key] = product
+        self._fingerprints[key] = tuple(product.get(field) for field in INDEXED_FIELDS)
+
+        tokens = sorted(set(tokenize(product.get('nome'))))
+        self._tokens_by_key[key] = tokens
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(key)
+
+        if product.get('sku'):
+            self._by_sku[normalize_code(product['sku'])] = key
+        if product.get('barcode'):
+            self._by_barcode[normalize_code(product['barcode'])] = key
+
+    def _remove(self, key: str) -> None:
+        product = self._products.pop(key)
+        self._fingerprints.pop(key, None)
+
+        for token in self._tokens_by_key.pop(key, []):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[token]
+
+        for code, mapping in ((product.get('sku'), self._by_sku), (product.get('barcode'), self._by_barcode)):
+            if code and mapping.get(normalize_code(code)) == key:
+                del mapping[normalize_code(code)]
@@ -0,0 +1,219 @@
+"""
+Local SQLite product store and incremental Notion sync.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
+
+from .notion_api import NotionUnavailableError
+
+# Seconds subtracted from a sync's start time for its high-water mark, to
+# cover clock skew with Notion and edits saved while the sync was starting
+HIGH_WATER_MARK_MARGIN = 60
+
+
+def sync_high_water_mark(started: float) -> str:
+    """
+    High-water mark for a sync that started at ``started`` (epoch seconds).
+
+    The mark comes from the start of the sync rather than the newest page
+    seen: a page fetched early and edited while the download continues
+    keeps an older last_edited_time in the results, but its edit is later
+    than the start. Truncated to the minute, Notion's resolution.
+    """
+    moment = datetime.fromtimestamp(started - HIGH_WATER_MARK_MARGIN, tz=timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:00.000Z')
+
+
+class ProductStore:
+    """SQLite copy of the active products, keyed by Notion page id."""
+
+    def __init__(self, db_path: str = None):
+        load_dotenv()
+        self.db_path = Path(db_path or os.getenv('PRODUCT_STORE_PATH', './data/products.db'))
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def transaction(self):
+        """Open a connection, commit on success and always close it."""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self.transaction() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    created_time TEXT,
+                    last_edited_time TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_products_created ON products (created_time, id);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def get_products(self) -> List[Dict[str, Any]]:
+        """Return all stored products in creation order."""
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT data FROM products ORDER BY created_time, id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self) -> int:
+        """Number of stored products."""
+        with self.transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def upsert(self, conn: sqlite3.Connection, page_id: str, product: Dict[str, Any],
+               created_time: Optional[str], last_edited_time: str) -> None:
+        """Insert or replace a product inside an open transaction."""
+        conn.execute(
+            "INSERT OR REPLACE INTO products (id, data, created_time, last_edited_time) VALUES (?, ?, ?, ?)",
+            (page_id, json.dumps(product, ensure_ascii=False), created_time, last_edited_time)
+        )
+
+    def delete(self, conn: sqlite3.Connection, page_id: str) -> bool:
+        """Delete a product inside an open transaction; returns True if it existed."""
+        return conn.execute("DELETE FROM products WHERE id = ?", (page_id,)).rowcount > 0
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+class ProductSync:
+    """
+    Keeps a ProductStore up to date with the Notion database.
+
+    The first sync (and a periodic full resync, which also catches pages
+    deleted from Notion) downloads every active product. Later syncs only
+    query pages whose last_edited_time is at or after the stored high-water
+    mark, upserting active products and removing unchecked or archived ones.
+    """
+
+    def __init__(self, notion_client, store: ProductStore = None):
+        load_dotenv()
+        self.notion_client = notion_client
+        self.store = store or ProductStore()
+        self.full_sync_interval = int(os.getenv('PRODUCT_SYNC_FULL_INTERVAL', '86400'))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def get_products(self) -> List[Dict[str, Any]]:
+        """
+        Sync with Notion and return the stored active products.
+
+        Raises:
+            NotionUnavailableError: If the sync fails (Notion down, circuit
+                breaker open) after an earlier sync filled the store; it
+                carries the stored products
+        """
+        try:
+            self.sync()
+        except Exception as e:
+            if not self.store.count():
+                raise
+            self.logger.warning(f"Sync failed, stored products are stale: {str(e)}")
+            raise NotionUnavailableError(str(e), self.store.get_products()) from e
+        return self.store.get_products()
+
+    def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the local store up to date.
+
+        Args:
+            full: Force a full resync instead of a delta query
+
+        Returns:
+            Summary with mode, upserted/removed counts and the new high-water mark
+        """
+        with self._lock:
+            high_water_mark = self.store.get_meta('high_water_mark')
+            last_full_sync = float(self.store.get_meta('last_full_sync') or 0)
+
+            if full or not high_water_mark or time.time() - last_full_sync > self.full_sync_interval:
+                return self._full_sync()
+            return self._delta_sync(high_water_mark)
+
+    def _full_sync(self) -> Dict[str, Any]:
+        started = time.time()
+        high_water_mark = sync_high_water_mark(started)
+
+        # Fetch everything before opening the write transaction, so other
+        # workers syncing the same store are not locked out for the whole download
+        rows = {}
+        for pages in self.notion_client.iter_active_pages():
+            for page in pages:
+                product = self.notion_client._extract_product_data(page)
+                if not product:
+                    continue
+                rows[page['id']] = (product, page.get('created_time'), page['last_edited_time'])
+
+        with self.store.transaction() as conn:
+            for page_id, (product, created_time, last_edited_time) in rows.items():
+                self.store.upsert(conn, page_id, product, created_time, last_edited_time)
+
+            stored_ids = {row[0] for row in conn.execute("SELECT id FROM products")}
+            removed = 0
+            for page_id in stored_ids - rows.keys():
+                removed += self.store.delete(conn, page_id)
+
+            self.store.set_meta(conn, 'high_water_mark', high_water_mark)
+            self.store.set_meta(conn, 'last_full_sync', str(started))
+
+        upserted = len(rows)
+        self.logger.info(f"Full product sync: {upserted} products stored, {removed} removed")
+        return {'mode': 'full', 'upserted': upserted, 'removed': removed, 'high_water_mark': high_water_mark}
+
+    def _delta_sync(self, high_water_mark: str) -> Dict[str, Any]:
+        upserted = 0
+        removed = 0
+        new_mark = max(high_water_mark, sync_high_water_mark(time.time()))
+
+        # As in _full_sync, the changed pages are fetched before writing
+        changes = []
+        for pages in self.notion_client.query_changed_pages(high_water_mark):
+            for page in pages:
+                product = None
+                if self.notion_client.is_active_page(page):
+                    product = self.notion_client._extract_product_data(page)
+                changes.append((page, product))
+
+        with self.store.transaction() as conn:
+            for page, product in changes:
+                if product:
+                    self.store.upsert(conn, page['id'], product, page.get('created_time'), page['last_edited_time'])
+                    upserted += 1
+                else:
+                    removed += self.store.delete(conn, page['id'])
+
+            self.store.set_meta(conn, 'high_water_mark', new_mark)
+
+        self.logger.info(f"Incremental product sync: {upserted} updated, {removed} removed")
+        return {'mode': 'delta', 'upserted': upserted, 'removed': removed, 'high_water_mark': new_mark}
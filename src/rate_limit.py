@@ -0,0 +1,244 @@
+"""
+Rate limiting and failure isolation primitives: token bucket, circuit
+breaker and jittered exponential backoff.
+"""
+
+import time
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    The bucket is shared by every thread and coroutine holding it. With a
+    ``state_path`` its state lives in a SQLite file instead, so several
+    processes (API workers, CLI runs) share one budget.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 state_path: Optional[str] = None, name: str = 'default'):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.name = name
+        self.state_path = Path(state_path) if state_path else None
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+        if self.state_path:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.state_path), timeout=30, isolation_level=None)
+
+    def _take(self, tokens: float = 1.0, consume: bool = True) -> float:
+        """
+        Take tokens if available; otherwise return the seconds until they will be.
+
+        With ``consume=False`` the bucket is only inspected; a negative
+        ``tokens`` gives tokens back, up to capacity.
+        """
+        if self.state_path:
+            return self._take_shared(tokens, consume)
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                if consume:
+                    self._tokens = min(self.capacity, self._tokens - tokens)
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def _take_shared(self, tokens: float, consume: bool = True) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            available = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+
+            wait = 0.0
+            if available >= tokens:
+                if consume:
+                    available = min(self.capacity, available - tokens)
+            else:
+                wait = (tokens - available) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, available, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting; returns False if the bucket is empty."""
+        return self._take(tokens) == 0.0
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Give back tokens taken for an attempt that should not count."""
+        self._take(-tokens)
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens are available, without taking them."""
+        return self._take(tokens, consume=False)
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block the calling thread until tokens are available."""
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 1.0) -> None:
+        """Wait on the event loop until tokens are available."""
+        while True:
+            if self.state_path:
+                # The shared bucket may wait on another process's SQLite lock
+                wait = await asyncio.to_thread(self._take, tokens)
+            else:
+                wait = self._take(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+
+class KeyedRateLimiter:
+    """
+    One in-memory token bucket per key (client IP, account email, ...).
+
+    Buckets are created on first use and the least recently used ones are
+    dropped beyond ``max_keys``, so memory stays bounded however many
+    distinct keys a client cycles through.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 max_keys: int = 10000, name: str = 'default'):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity, name=f"{self.name}:{key}")
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def hit(self, key: str, tokens: float = 1.0) -> float:
+        """Take tokens for ``key``; returns 0 on success or the seconds to wait."""
+        return self._bucket(key)._take(tokens)
+
+    def refund(self, key: str, tokens: float = 1.0) -> None:
+        """Give back tokens taken for ``key`` by ``hit``."""
+        self._bucket(key).refund(tokens)
+
+    def check(self, key: str, tokens: float = 1.0) -> float:
+        """Seconds until ``key`` has tokens available (0 if it has), without taking them."""
+        return self._bucket(key).wait_time(tokens)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast with CircuitOpenError. Once ``reset_timeout`` seconds
+    have passed a single trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, name: str = 'default'):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"Circuit '{self.name}' is open; retry in {remaining:.0f}s")
+            # Let one trial call through; others keep failing fast until it reports back
+            self._state = self.HALF_OPEN
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                self.logger.info(f"Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Delay before retry number ``attempt`` (0-based).
+
+    A server-provided Retry-After is honoured with a little jitter on top;
+    otherwise "full jitter" exponential backoff is used.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
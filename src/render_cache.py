@@ -0,0 +1,142 @@
+"""
+Cache of rendered catalog PDFs keyed on a hash of everything that affects
+the output.
+
+Generation date policy: the header of a cached PDF shows the time it was
+first rendered. Entries expire after RENDER_CACHE_MAX_AGE seconds, which
+bounds how old that date can be.
+"""
+
+import os
+import time
+import json
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any
+from dotenv import load_dotenv
+
+from .storage import temporary_path
+
+# Product fields that end up in the rendered catalog
+RENDERED_FIELDS = ('nome', 'preco', 'sku', 'barcode')
+
+
+def hash_directory(path: Path) -> str:
+    """Hash the names and contents of every file under a directory."""
+    digest = hashlib.sha256()
+    for file_path in sorted(p for p in path.rglob('*') if p.is_file()):
+        digest.update(str(file_path.relative_to(path)).encode('utf-8'))
+        digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Content-hash keyed PDF cache with size and age bounded eviction."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, max_age: int = None):
+        load_dotenv()
+        self.cache_dir = Path(cache_dir or os.getenv('RENDER_CACHE_DIR', './cache/renders'))
+        self.max_bytes = max_bytes or int(float(os.getenv('RENDER_CACHE_MAX_MB', '1000')) * 1024 * 1024)
+        self.max_age = max_age or int(os.getenv('RENDER_CACHE_MAX_AGE', '86400'))
+        self.logger = logging.getLogger(__name__)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, products: List[Dict[str, Any]], title: str, image_versions: Dict[str, str],
+            template_hash: str, render_options: Dict[str, Any] = None) -> str:
+        """
+        Compute the cache key for a render.
+
+        Image URLs are replaced by the content digest of the image they point
+        to, so re-signed Notion URLs for unchanged images hit the cache.
+
+        Args:
+            products: Product dictionaries in catalog order
+            title: Catalog title
+            image_versions: Mapping of image URL to content digest
+            template_hash: Hash of the template directory
+            render_options: Other settings that change the output
+
+        Returns:
+            Hex digest
+        """
+        normalized = []
+        for product in products:
+            entry = {field: product.get(field) for field in RENDERED_FIELDS}
+            url = product.get('imagem_url')
+            entry['image'] = image_versions.get(url, url) if url else None
+            normalized.append(entry)
+
+        payload = {
+            'products': normalized,
+            'title': title,
+            'template': template_hash,
+            'options': render_options or {},
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def materialize(self, key: str, output_path: Path) -> bool:
+        """
+        Place a cached PDF at output_path.
+
+        Returns:
+            True on a cache hit
+        """
+        entry = self._entry_path(key)
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            return False
+
+        if time.time() - stat.st_mtime > self.max_age:
+            entry.unlink(missing_ok=True)
+            return False
+
+        # Copied, not hard-linked: a link would share the entry's inode, so the
+        # delivered PDF would carry the entry's old mtime (which output
+        # retention reads as its creation time) and the atime update below
+        output_path.unlink(missing_ok=True)
+        shutil.copyfile(entry, output_path)
+
+        # mtime records when the entry was rendered, atime when it was last used
+        os.utime(entry, (time.time(), stat.st_mtime))
+        return True
+
+    def put(self, key: str, pdf_path: Path) -> None:
+        """Store a freshly rendered PDF."""
+        entry = self._entry_path(key)
+        tmp_path = temporary_path(entry)
+        try:
+            shutil.copyfile(pdf_path, tmp_path)
+            os.replace(tmp_path, entry)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones over the size budget."""
+        now = time.time()
+        entries = []
+        for entry in self.cache_dir.glob('*.pdf'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                entry.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_atime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,82 @@
+"""
+Long-lived WeasyPrint rendering state shared by every render in a process.
+"""
+
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Any, Tuple
+
+
+class RenderWorker:
+    """
+    Keeps the parsed stylesheet, font configuration and decoded static
+    assets (e.g. the logo) of the template directory in memory and reuses
+    them across renders. Everything is reloaded when a file in the template
+    directory changes on disk. The Jinja template itself is cached and
+    auto-reloaded by the generator's Jinja environment.
+
+    WeasyPrint (and its Pango/cairo stack) is imported on first render, so
+    processes that never render, like the API server, do not load it.
+    """
+
+    def __init__(self, template_dir: Path, stylesheet: str = 'styles.css'):
+        self.template_dir = Path(template_dir)
+        self.stylesheet_path = self.template_dir / stylesheet
+        self.logger = logging.getLogger(__name__)
+
+        self.font_config = None
+        self.stylesheet = None
+        self.asset_cache: Dict[str, Any] = {}
+        self._signature = None
+
+    def _current_signature(self) -> Tuple:
+        return tuple(
+            (str(path), stat.st_mtime_ns, stat.st_size)
+            for path in sorted(self.template_dir.rglob('*'))
+            for stat in [path.stat()]
+            if path.is_file()
+        )
+
+    def ensure_loaded(self) -> None:
+        """Load resources on first use, or reload them if template files changed."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+
+        import weasyprint
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.font_config = FontConfiguration()
+        self.stylesheet = weasyprint.CSS(filename=str(self.stylesheet_path), font_config=self.font_config)
+        self.asset_cache = {}
+        self._signature = signature
+        self.logger.info(f"Loaded render resources from {self.template_dir}")
+
+    def write_pdf(self, html_content: str, output_path: Path,
+                  url_fetcher: Callable[..., Dict[str, Any]]) -> None:
+        """
+        Render HTML to a PDF file using the preloaded resources.
+
+        Args:
+            html_content: HTML string to convert (without a stylesheet link)
+            output_path: Path where the PDF should be saved
+            url_fetcher: WeasyPrint url_fetcher for images
+        """
+        self.ensure_loaded()
+        import weasyprint
+
+        # Seed the image cache with the decoded static assets only, so product
+        # images do not accumulate in memory across renders
+        image_cache = dict(self.asset_cache)
+
+        html_doc = weasyprint.HTML(string=html_content, base_url=str(self.template_dir), url_fetcher=url_fetcher)
+        html_doc.write_pdf(
+            str(output_path),
+            stylesheets=[self.stylesheet],
+            font_config=self.font_config,
+            cache=image_cache
+        )
+
+        for url, image in image_cache.items():
+            if url.startswith('file:'):
+                self.asset_cache[url] = image
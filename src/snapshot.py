@@ -0,0 +1,143 @@
+"""
+Offline product snapshots: extracted products plus their cached images in
+a single SQLite file, for rendering without Notion access.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+from .image_cache import ImageCache
+
+SNAPSHOT_FORMAT_VERSION = '1'
+
+
+class ProductSnapshot:
+    """
+    Snapshot file holding the product list in order and the image bytes
+    it references (stored once per content digest).
+
+    Exported from a live run with ``export``; a snapshot is read with
+    ``load_products`` and ``restore_images``, which seeds the image cache so
+    rendering never goes to the network.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.logger = logging.getLogger(__name__)
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        return sqlite3.connect(str(path), timeout=30)
+
+    def export(self, products: List[Dict[str, Any]], image_cache: ImageCache) -> Dict[str, Any]:
+        """
+        Write products and their images to the snapshot file.
+
+        Images are prefetched into the cache first; images that cannot be
+        downloaded are left out (the template shows its placeholder). The
+        file is written under a temporary name and renamed into place.
+
+        Returns:
+            Summary with product and image counts and the file size
+        """
+        urls = [product.get('imagem_url') for product in products]
+        digests = image_cache.prefetch(urls)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.unlink(missing_ok=True)
+
+        conn = self._connect(tmp_path)
+        try:
+            conn.executescript("""
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE products (position INTEGER PRIMARY KEY, data TEXT NOT NULL);
+                CREATE TABLE images (url TEXT PRIMARY KEY, digest TEXT NOT NULL);
+                CREATE TABLE blobs (digest TEXT PRIMARY KEY, mime_type TEXT, data BLOB NOT NULL);
+            """)
+            conn.executemany(
+                "INSERT INTO products (position, data) VALUES (?, ?)",
+                ((position, json.dumps(product, ensure_ascii=False)) for position, product in enumerate(products))
+            )
+
+            for url in digests:
+                hit = image_cache.lookup(url)
+                if hit is None:
+                    continue
+                digest, mime_type = hit
+                conn.execute("INSERT OR REPLACE INTO images (url, digest) VALUES (?, ?)", (url, digest))
+                conn.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, mime_type, data) VALUES (?, ?, ?)",
+                    (digest, mime_type, image_cache.read(digest))
+                )
+
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ('format_version', SNAPSHOT_FORMAT_VERSION),
+                ('created_at', datetime.now().isoformat()),
+                ('product_count', str(len(products))),
+            ])
+            conn.commit()
+            image_count = conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, self.path)
+        summary = {
+            'products': len(products),
+            'images': image_count,
+            'size_bytes': self.path.stat().st_size,
+        }
+        self.logger.info(f"Exported snapshot {self.path}: {summary}")
+        return summary
+
+    def _open(self) -> sqlite3.Connection:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Snapshot not found: {self.path}")
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        version = dict(conn.execute("SELECT key, value FROM meta").fetchall()).get('format_version')
+        if version != SNAPSHOT_FORMAT_VERSION:
+            conn.close()
+            raise ValueError(f"Unsupported snapshot format version: {version}")
+        return conn
+
+    def info(self) -> Dict[str, str]:
+        """Snapshot metadata (format version, creation time, product count)."""
+        conn = self._open()
+        try:
+            return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            conn.close()
+
+    def load_products(self) -> List[Dict[str, Any]]:
+        """Return the snapshot's products in their original order."""
+        conn = self._open()
+        try:
+            rows = conn.execute("SELECT data FROM products ORDER BY position").fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def restore_images(self, image_cache: ImageCache) -> int:
+        """
+        Seed the image cache with the snapshot's images.
+
+        Returns:
+            Number of image URLs restored
+        """
+        conn = self._open()
+        try:
+            rows = conn.execute(
+                "SELECT images.url, blobs.mime_type, blobs.data FROM images JOIN blobs USING (digest)"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        for url, mime_type, data in rows:
+            if image_cache.lookup(url) is None:
+                image_cache.put(url, data, mime_type)
+        self.logger.info(f"Restored {len(rows)} images from snapshot {self.path}")
+        return len(rows)
@@ -0,0 +1,210 @@
+"""
+In-memory serving of the built frontend (frontend/dist) with precompressed
+variants, Accept-Encoding negotiation and strong ETags.
+"""
+
+import os
+import gzip
+import mmap
+import time
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from dotenv import load_dotenv
+
+from .http_cache import CHUNK_SIZE, etag_matches
+
+try:
+    import brotli
+except ImportError:
+    # Listed in requirements.txt; without it only gzip variants are served
+    brotli = None
+
+# Vite emits content-hashed bundles under assets/; they never change under the same name
+HASHED_ASSETS_PREFIX = 'assets/'
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else (index.html, favicon, ...) is revalidated with its ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/manifest+json',
+    'application/xml', 'application/wasm', 'image/svg+xml',
+)
+
+# Server preference when the client accepts several encodings
+ENCODINGS = ('br', 'gzip')
+ENCODING_SUFFIXES = {'.br': 'br', '.gz': 'gzip'}
+
+Body = Union[bytes, mmap.mmap]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Pick the content coding to send.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+        available: Encodings the asset has
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    if not accept_encoding:
+        return 'identity'
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def _iter_mmap(body: mmap.mmap) -> Iterator[bytes]:
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE]
+
+
+class StaticAsset:
+    """One frontend file and its encoded representations."""
+
+    def __init__(self, media_type: str, cache_control: str, identity: Body, digest: str):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.digest = digest
+        self.bodies: Dict[str, Body] = {'identity': identity}
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag of one representation; each encoding gets its own."""
+        if encoding == 'identity':
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+class StaticAssets:
+    """
+    The frontend build, loaded into memory once at startup.
+
+    Compressible files get gzip and br variants, taken from the ``.gz``/``.br``
+    files the frontend build emits (at maximum compression) or, for files
+    without them, computed once at a quality that keeps startup fast. Files of STATIC_MMAP_THRESHOLD bytes or more are
+    memory-mapped instead of read, so large images or fonts stay in the
+    page cache rather than the heap.
+    """
+
+    def __init__(self, root: Path):
+        load_dotenv()
+        self.root = Path(root)
+        self.mmap_threshold = int(os.getenv('STATIC_MMAP_THRESHOLD', str(1024 * 1024)))
+        self.min_compress_size = int(os.getenv('STATIC_MIN_COMPRESS_SIZE', '1024'))
+        self.brotli_quality = int(os.getenv('STATIC_BROTLI_QUALITY', '5'))
+        self.logger = logging.getLogger(__name__)
+        self.assets: Dict[str, StaticAsset] = {}
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read and compress every file under the root directory.
+
+        Returns:
+            Summary with file count, identity and compressed sizes and seconds taken
+        """
+        started = time.perf_counter()
+        if not self.root.is_dir():
+            self.logger.warning(f"Frontend dist directory not found: {self.root}")
+            return {'files': 0}
+
+        files = {path.relative_to(self.root).as_posix(): path for path in self.root.rglob('*') if path.is_file()}
+        assets = {}
+        for name, path in files.items():
+            suffix = Path(name).suffix
+            if suffix in ENCODING_SUFFIXES and name[:-len(suffix)] in files:
+                # Precompressed by the build; attached to the original below
+                continue
+            assets[name] = self._load_asset(name, path, files)
+
+        self.assets = assets
+        summary = {
+            'files': len(assets),
+            'identity_bytes': sum(len(asset.bodies['identity']) for asset in assets.values()),
+            'compressed_bytes': {
+                encoding: sum(len(asset.bodies[encoding]) for asset in assets.values() if encoding in asset.bodies)
+                for encoding in ENCODINGS
+            },
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        self.logger.info(f"Loaded frontend from {self.root}: {summary}")
+        return summary
+
+    def _load_asset(self, name: str, path: Path, files: Dict[str, Path]) -> StaticAsset:
+        media_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        cache_control = IMMUTABLE_CACHE_CONTROL if name.startswith(HASHED_ASSETS_PREFIX) else REVALIDATE_CACHE_CONTROL
+
+        size = path.stat().st_size
+        if size and size >= self.mmap_threshold:
+            with open(path, 'rb') as f:
+                identity = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            identity = path.read_bytes()
+
+        digest = hashlib.sha256(identity).hexdigest()[:32]
+        asset = StaticAsset(media_type, cache_control, identity, digest)
+
+        if size < self.min_compress_size or not media_type.startswith(COMPRESSIBLE_TYPES):
+            return asset
+
+        for suffix, encoding in ENCODING_SUFFIXES.items():
+            if name + suffix in files:
+                asset.bodies[encoding] = files[name + suffix].read_bytes()
+        if 'gzip' not in asset.bodies:
+            asset.bodies['gzip'] = gzip.compress(identity, compresslevel=9, mtime=0)
+        if 'br' not in asset.bodies and brotli is not None:
+            asset.bodies['br'] = brotli.compress(bytes(identity), quality=self.brotli_quality)
+
+        # Keep only variants that are actually smaller
+        for encoding in ENCODINGS:
+            if encoding in asset.bodies and len(asset.bodies[encoding]) >= size:
+                del asset.bodies[encoding]
+        return asset
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        """Asset by path relative to the dist directory, or None."""
+        return self.assets.get(name)
+
+    def response(self, request: Request, asset: StaticAsset) -> Response:
+        """
+        Serve an asset in the best encoding the client accepts.
+
+        Returns:
+            200 with the encoded body, or 304 when If-None-Match matches
+        """
+        encoding = negotiate_encoding(request.headers.get('accept-encoding'), asset.bodies)
+        etag = asset.etag(encoding)
+        headers = {'ETag': etag, 'Cache-Control': asset.cache_control}
+        if len(asset.bodies) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.bodies[encoding]
+        if isinstance(body, mmap.mmap):
+            headers['Content-Length'] = str(len(body))
+            return StreamingResponse(_iter_mmap(body), media_type=asset.media_type, headers=headers)
+        return Response(content=body, media_type=asset.media_type, headers=headers)
@@ -0,0 +1,248 @@
+"""
+Retention and disk quota management for generated catalogs.
+"""
+
+import os
+import re
+import time
+import uuid
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+# Files younger than this are never collected (they may still be written)
+MIN_AGE_SECONDS = 300
+
+# Leftover temporary files from interrupted renders are removed after this
+STALE_TMP_SECONDS = 3600
+
+CATALOG_PREFIX = 'catalogo_ja_distribuidora'
+
+# Stable "latest" copies published by watch mode; never collected
+LATEST_DIR = 'latest'
+
+# catalogo_ja_distribuidora_<YYYYmmdd>_<HHMMSS>_<id>.pdf
+CATALOG_NAME_PATTERN = re.compile(rf'^{CATALOG_PREFIX}_(\d{{4}})(\d{{2}})(\d{{2}})_\d{{6}}_[0-9a-f]+\.pdf$')
+
+
+def new_catalog_name(unique_id: str = None, when: datetime = None) -> str:
+    """
+    Build a collision-free, human readable catalog filename.
+
+    Args:
+        unique_id: Job id or other unique hex string (random if omitted)
+        when: Generation time (defaults to now)
+
+    Returns:
+        Filename such as catalogo_ja_distribuidora_20250101_120000_1a2b3c4d5e6f.pdf
+    """
+    when = when or datetime.now()
+    unique_id = (unique_id or uuid.uuid4().hex)[:12]
+    return f"{CATALOG_PREFIX}_{when.strftime('%Y%m%d_%H%M%S')}_{unique_id}.pdf"
+
+
+def catalog_path(output_dir: Path, filename: str) -> Path:
+    """
+    Resolve where a catalog is stored.
+
+    Generated names are sharded into YYYY/MM/DD subdirectories so no single
+    directory grows unbounded; other names (custom CLI filenames, catalogs
+    from older versions) live directly in the output directory.
+    """
+    match = CATALOG_NAME_PATTERN.match(filename)
+    if match:
+        return Path(output_dir).joinpath(*match.groups(), filename)
+    return Path(output_dir) / filename
+
+
+def temporary_path(path: Path) -> Path:
+    """Hidden sibling path to write to before atomically renaming into place."""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+class CatalogStorage:
+    """
+    Index of generated catalogs in the output directory.
+
+    Tracks size, creation time, owner and last access of every PDF and
+    enforces a maximum age and a disk quota, evicting least recently used
+    files first. Files with an active download lease are never deleted.
+    """
+
+    def __init__(self, output_dir: str = None, max_bytes: int = None, max_age: int = None):
+        load_dotenv()
+        self.output_dir = Path(output_dir or os.getenv('OUTPUT_DIR', './output'))
+        self.max_bytes = max_bytes or int(float(os.getenv('OUTPUT_MAX_MB', '2048')) * 1024 * 1024)
+        self.max_age = max_age or int(float(os.getenv('OUTPUT_MAX_AGE_DAYS', '30')) * 86400)
+        self.lease_seconds = int(os.getenv('DOWNLOAD_LEASE_SECONDS', '600'))
+        self.logger = logging.getLogger(__name__)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.output_dir / '.catalogs.db'
+        self._init_db()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._transaction() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS catalogs (
+                    name TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    owner TEXT,
+                    last_access REAL NOT NULL,
+                    leases INTEGER NOT NULL DEFAULT 0,
+                    leased_until REAL NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_catalogs_access ON catalogs (last_access);
+            """)
+
+    def register(self, path: str, owner: Optional[str] = None) -> None:
+        """Add a newly generated catalog to the index."""
+        file_path = Path(path)
+        stat = file_path.stat()
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO catalogs (name, path, size, created_at, owner, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (file_path.name, str(file_path), stat.st_size, now, owner, now)
+            )
+
+    @contextmanager
+    def lease(self, name: str):
+        """
+        Protect a catalog from collection while it is being downloaded.
+
+        The lease also records the access for LRU ordering. It expires after
+        DOWNLOAD_LEASE_SECONDS in case the process dies mid-download.
+        """
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def acquire(self, name: str) -> None:
+        """
+        Take a download lease on a catalog.
+
+        A file that exists but is not indexed yet (not registered or
+        reconciled) is added to the index first, so it is leased too.
+        """
+        now = time.time()
+        file_path = catalog_path(self.output_dir, name)
+        with self._transaction() as conn:
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                stat = None
+            if stat is not None:
+                conn.execute(
+                    """INSERT OR IGNORE INTO catalogs (name, path, size, created_at, owner, last_access)
+                       VALUES (?, ?, ?, ?, NULL, ?)""",
+                    (name, str(file_path), stat.st_size, stat.st_mtime, now)
+                )
+            conn.execute(
+                "UPDATE catalogs SET leases = leases + 1, leased_until = ?, last_access = ? WHERE name = ?",
+                (now + self.lease_seconds, now, name)
+            )
+
+    def release(self, name: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("UPDATE catalogs SET leases = MAX(leases - 1, 0) WHERE name = ?", (name,))
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Run one garbage collection pass.
+
+        Untracked PDFs found on disk are indexed, rows for missing files are
+        dropped, then expired catalogs and least recently used ones over the
+        quota are deleted.
+
+        Returns:
+            Summary with removed file count, freed bytes and remaining usage
+        """
+        now = time.time()
+        removed = 0
+        freed = 0
+
+        with self._transaction() as conn:
+            self._reconcile(conn, now)
+
+            rows = conn.execute(
+                "SELECT name, path, size, created_at, leases, leased_until FROM catalogs ORDER BY last_access"
+            ).fetchall()
+            total = sum(row[2] for row in rows)
+
+            for name, path, size, created_at, leases, leased_until in rows:
+                expired = now - created_at > self.max_age
+                if not expired and total <= self.max_bytes:
+                    continue
+                if (leases > 0 and leased_until > now) or now - created_at < MIN_AGE_SECONDS:
+                    continue
+
+                Path(path).unlink(missing_ok=True)
+                conn.execute("DELETE FROM catalogs WHERE name = ?", (name,))
+                removed += 1
+                freed += size
+                total -= size
+
+        if removed:
+            self.logger.info(f"Catalog storage GC removed {removed} files ({freed} bytes)")
+        return {'removed': removed, 'freed_bytes': freed, 'used_bytes': total, 'quota_bytes': self.max_bytes}
+
+    def usage(self) -> Dict[str, int]:
+        """Indexed catalog count and total size."""
+        with self._transaction() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM catalogs").fetchone()
+        return {'catalogs': count, 'used_bytes': total, 'quota_bytes': self.max_bytes}
+
+    def _reconcile(self, conn: sqlite3.Connection, now: float) -> None:
+        """Bring the index in line with the files on disk."""
+        indexed = {row[0]: row[1] for row in conn.execute("SELECT name, path FROM catalogs")}
+
+        for name, path in indexed.items():
+            if not Path(path).exists():
+                conn.execute("DELETE FROM catalogs WHERE name = ?", (name,))
+
+        # Files can be renamed or collected between listing and stat()
+        for tmp_path in self.output_dir.rglob('.*.tmp'):
+            try:
+                mtime = tmp_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if now - mtime > STALE_TMP_SECONDS:
+                tmp_path.unlink(missing_ok=True)
+
+        for file_path in self.output_dir.rglob('*.pdf'):
+            relative = file_path.relative_to(self.output_dir)
+            if any(part.startswith('.') for part in relative.parts) or relative.parts[0] == LATEST_DIR \
+                    or file_path.name in indexed:
+                continue
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            conn.execute(
+                """INSERT OR IGNORE INTO catalogs (name, path, size, created_at, owner, last_access)
+                   VALUES (?, ?, ?, ?, NULL, ?)""",
+                (file_path.name, str(file_path), stat.st_size, stat.st_mtime, stat.st_atime)
+            )
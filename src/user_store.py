@@ -0,0 +1,235 @@
+"""
+User account storage backends: SQLite (default) and the legacy JSON file.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+USER_FIELDS = ('email', 'full_name', 'role', 'is_active', 'created_at', 'hashed_password')
+
+# users.json used to live in the repository root
+LEGACY_USERS_FILE = os.path.join(os.path.dirname(__file__), '..', 'users.json')
+
+
+class UserExistsError(Exception):
+    """Raised when adding a user whose email is already taken."""
+
+
+class SQLiteUserStore:
+    """
+    Users in a SQLite table (WAL mode), shared by every API worker process.
+
+    Reads are served from an in-memory copy that is reloaded whenever
+    ``PRAGMA data_version`` reports a commit from another connection, so a
+    user created or rehashed on one worker is seen by the others on their
+    next request without a restart. On first use an existing users.json is
+    imported.
+    """
+
+    def __init__(self, db_path: str = None, legacy_json_path: str = None):
+        load_dotenv()
+        self.db_path = Path(db_path or os.getenv('USER_STORE_PATH', './data/users.db'))
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._data_version = None
+        self._users: Dict[str, Dict[str, Any]] = {}
+
+        self._init_db()
+        self._migrate_json(Path(legacy_json_path or os.getenv('USER_STORE_JSON_PATH', LEGACY_USERS_FILE)))
+
+    @contextmanager
+    def transaction(self):
+        """Run statements in one write transaction; the cache is reloaded afterwards."""
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                # data_version does not change for this connection's own commits
+                self._data_version = None
+
+    def _init_db(self) -> None:
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    email TEXT PRIMARY KEY,
+                    full_name TEXT NOT NULL,
+                    role TEXT NOT NULL DEFAULT 'user',
+                    is_active INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT,
+                    hashed_password TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)")
+
+    def _migrate_json(self, json_path: Path) -> None:
+        """Import users.json into an empty table; the JSON file is left in place."""
+        if not json_path.exists() or self.count():
+            return
+        with open(json_path, 'r') as f:
+            users_data = json.load(f)
+        with self.transaction() as conn:
+            for user in users_data.values():
+                conn.execute(
+                    "INSERT OR IGNORE INTO users (email, full_name, role, is_active, created_at, hashed_password) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self._row(user)
+                )
+        self.logger.info(f"Imported {len(users_data)} users from {json_path} into {self.db_path}")
+
+    @staticmethod
+    def _row(user: Dict[str, Any]) -> tuple:
+        return (
+            user['email'], user['full_name'], user.get('role', 'user'), int(user.get('is_active', True)),
+            user.get('created_at'), user['hashed_password']
+        )
+
+    def _refresh(self) -> None:
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            rows = self._conn.execute(f"SELECT {', '.join(USER_FIELDS)} FROM users").fetchall()
+            self._users = {row['email']: {**dict(row), 'is_active': bool(row['is_active'])} for row in rows}
+            self._data_version = data_version
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            user = self._users.get(email)
+        return dict(user) if user else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return {email: dict(user) for email, user in self._users.items()}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def add(self, user: Dict[str, Any]) -> None:
+        """
+        Insert a new user.
+
+        Raises:
+            UserExistsError: If the email is already registered
+        """
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (email, full_name, role, is_active, created_at, hashed_password) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self._row(user)
+                )
+        except sqlite3.IntegrityError:
+            raise UserExistsError(user['email'])
+
+    def update(self, user: Dict[str, Any]) -> None:
+        """Replace an existing user's fields."""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE users SET full_name = ?, role = ?, is_active = ?, created_at = ?, hashed_password = ? "
+                "WHERE email = ?",
+                self._row(user)[1:] + (user['email'],)
+            )
+
+
+class JsonUserStore:
+    """
+    Users in a single JSON file (the original storage).
+
+    Writes go to a temporary file that is renamed over the original, and
+    the file is re-read when its modification time changes. Concurrent
+    writers in different processes can still overwrite each other's
+    changes, so use the SQLite backend with several API workers.
+    """
+
+    def __init__(self, json_path: str = None):
+        load_dotenv()
+        self.path = Path(json_path or os.getenv('USER_STORE_JSON_PATH', LEGACY_USERS_FILE))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._users: Dict[str, Dict[str, Any]] = {}
+
+    def _refresh(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._users, self._stamp = {}, None
+            return
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with open(self.path, 'r') as f:
+                self._users = json.load(f)
+            self._stamp = stamp
+
+    def _write(self) -> None:
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._users, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._stamp = None
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            user = self._users.get(email)
+        return dict(user) if user else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return {email: dict(user) for email, user in self._users.items()}
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._users)
+
+    def add(self, user: Dict[str, Any]) -> None:
+        """
+        Insert a new user.
+
+        Raises:
+            UserExistsError: If the email is already registered
+        """
+        with self._lock:
+            self._refresh()
+            if user['email'] in self._users:
+                raise UserExistsError(user['email'])
+            self._users[user['email']] = user
+            self._write()
+
+    def update(self, user: Dict[str, Any]) -> None:
+        """Replace an existing user's fields."""
+        with self._lock:
+            self._refresh()
+            self._users[user['email']] = user
+            self._write()
+
+
+def get_user_store():
+    """User store selected by USER_STORE_BACKEND ("sqlite" or "json")."""
+    load_dotenv()
+    backend = os.getenv('USER_STORE_BACKEND', 'sqlite').lower()
+    if backend == 'json':
+        return JsonUserStore()
+    if backend == 'sqlite':
+        return SQLiteUserStore()
+    raise ValueError(f"Unknown USER_STORE_BACKEND: {backend}")
@@ -0,0 +1,150 @@
+"""
+Watch mode: keep standing catalogs up to date, regenerating only those
+whose rendered content changed.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any
+
+from .batch import run_batch, select_products
+from .catalog_generator import DEFAULT_TITLE
+from .image_cache import ImageCache, image_cache_key
+from .product_store import ProductSync
+from .render_cache import RENDERED_FIELDS, hash_directory
+from .storage import CatalogStorage, LATEST_DIR
+from .utils import sanitize_filename
+
+
+def catalog_fingerprint(products: List[Dict[str, Any]], title: str, template_hash: str) -> str:
+    """
+    Hash of what a catalog would show.
+
+    Only template fields count, and image URLs are reduced to their stable
+    cache key, so re-signed Notion URLs or edits to other properties do not
+    trigger a regeneration.
+    """
+    payload = {
+        'products': [
+            [product.get(field) for field in RENDERED_FIELDS] +
+            [image_cache_key(product['imagem_url']) if product.get('imagem_url') else None]
+            for product in products
+        ],
+        'title': title,
+        'template': template_hash,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def publish_latest(output_path: str, latest_path: Path) -> None:
+    """Atomically point ``latest_path`` at a freshly generated catalog."""
+    latest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = latest_path.with_name(f".{latest_path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(output_path, tmp_path)
+    except OSError:
+        shutil.copyfile(output_path, tmp_path)
+    os.replace(tmp_path, latest_path)
+
+
+class CatalogWatcher:
+    """
+    Polls Notion through the incremental ProductSync (a cheap
+    last_edited_time delta query) and regenerates the standing catalogs
+    whose fingerprint changed, publishing each as ``<output>/latest/<name>.pdf``.
+
+    Fingerprints are stored in the product store, so a restart does not
+    regenerate catalogs that are already current.
+    """
+
+    def __init__(self, product_sync: ProductSync, manifest: Dict[str, Any], image_cache: ImageCache,
+                 output_dir: Path, template_dir: Path, interval: float = None):
+        self.product_sync = product_sync
+        self.manifest = manifest
+        self.image_cache = image_cache
+        self.latest_dir = Path(output_dir) / LATEST_DIR
+        self.template_dir = Path(template_dir)
+        self.interval = interval or float(os.getenv('WATCH_INTERVAL', '60'))
+        self.storage = CatalogStorage(output_dir=str(output_dir))
+        self.logger = logging.getLogger(__name__)
+
+        # Fingerprints are checked on the first poll even if nothing changed
+        self._fingerprints_current = False
+
+    def _latest_path(self, variant: Dict[str, Any]) -> Path:
+        """
+        Raises:
+            ValueError: If the variant name resolves outside the latest directory
+        """
+        path = self.latest_dir / f"{sanitize_filename(variant['name'])}.pdf"
+        if not path.resolve().is_relative_to(self.latest_dir.resolve()):
+            raise ValueError(f"Variant name resolves outside {self.latest_dir}: {variant['name']}")
+        return path
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """
+        Sync once and regenerate the catalogs that changed.
+
+        Returns:
+            Batch results for the regenerated catalogs (empty if none changed)
+        """
+        result = self.product_sync.sync()
+        variants = self.manifest['variants']
+        if not result['upserted'] and not result['removed'] and self._fingerprints_current:
+            return []
+
+        products = self.product_sync.store.get_products()
+        template_hash = hash_directory(self.template_dir)
+        default_title = self.manifest.get('title') or DEFAULT_TITLE
+
+        changed = {}
+        for variant in variants:
+            selected = select_products(products, variant)
+            if not selected:
+                continue
+            fingerprint = catalog_fingerprint(selected, variant.get('title') or default_title, template_hash)
+            key = f"watch_fingerprint:{variant['name']}"
+            if fingerprint != self.product_sync.store.get_meta(key) or not self._latest_path(variant).exists():
+                changed[variant['name']] = (variant, key, fingerprint)
+
+        self._fingerprints_current = True
+        if not changed:
+            self.logger.info(f"{result['upserted']} products changed, no catalog affected")
+            return []
+
+        results = run_batch(
+            {**self.manifest, 'variants': [variant for variant, _, _ in changed.values()]},
+            products, self.image_cache
+        )
+
+        for batch_result in results:
+            variant, key, fingerprint = changed[batch_result['name']]
+            if batch_result['error']:
+                # Check again on the next poll
+                self._fingerprints_current = False
+                self.logger.error(f"Could not regenerate '{variant['name']}': {batch_result['error']}")
+                continue
+            self.storage.register(batch_result['output_path'], owner='watch')
+            publish_latest(batch_result['output_path'], self._latest_path(variant))
+            with self.product_sync.store.transaction() as conn:
+                self.product_sync.store.set_meta(conn, key, fingerprint)
+            self.logger.info(f"Regenerated '{variant['name']}' -> {self._latest_path(variant)}")
+
+        return results
+
+    def run_forever(self) -> None:
+        """Poll until interrupted; errors are logged and retried on the next poll."""
+        self.logger.info(f"Watching {len(self.manifest['variants'])} catalogs every {self.interval:.0f}s")
+        while True:
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Watch cycle failed: {str(e)}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
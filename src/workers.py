@@ -0,0 +1,167 @@
+"""
+Bounded executors that keep blocking work off the API event loop.
+"""
+
+import os
+import asyncio
+import logging
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Pool sizes
+THREAD_POOL_SIZE = int(os.getenv('API_THREAD_POOL_SIZE', '4'))
+RENDER_POOL_SIZE = int(os.getenv('RENDER_PROCESS_POOL_SIZE', str(min(2, os.cpu_count() or 1))))
+AUTH_POOL_SIZE = int(os.getenv('AUTH_POOL_SIZE', '2'))
+AUTH_MAX_PENDING = int(os.getenv('AUTH_MAX_PENDING', '32'))
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+_auth_pool: Optional[ThreadPoolExecutor] = None
+_auth_slots = threading.BoundedSemaphore(AUTH_MAX_PENDING)
+
+
+class PoolBusyError(Exception):
+    """Raised when a bounded pool already has its maximum of pending work."""
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Thread pool for short blocking calls (SQLite, file I/O, sync HTTP)."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix='api-worker')
+        logger.info(f"Started thread pool with {THREAD_POOL_SIZE} workers")
+    return _thread_pool
+
+
+def get_auth_pool() -> ThreadPoolExecutor:
+    """
+    Dedicated thread pool for bcrypt hashing and verification.
+
+    Kept apart from the general thread pool so a burst of logins cannot
+    starve product loading or job bookkeeping (bcrypt releases the GIL).
+    """
+    global _auth_pool
+    if _auth_pool is None:
+        _auth_pool = ThreadPoolExecutor(max_workers=AUTH_POOL_SIZE, thread_name_prefix='auth-worker')
+        logger.info(f"Started auth pool with {AUTH_POOL_SIZE} workers")
+    return _auth_pool
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound PDF rendering."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None and getattr(_render_pool, '_broken', False):
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+            logger.warning("Render process pool broke (a worker died); starting a new one")
+        if _render_pool is None:
+            from .catalog_generator import chunk_worker_share, warm_up_worker
+
+            # Spawn, not fork: the API process runs threads and an event loop
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_POOL_SIZE,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up_worker,
+                initargs=(chunk_worker_share(RENDER_POOL_SIZE),)
+            )
+            logger.info(f"Started render process pool with {RENDER_POOL_SIZE} workers")
+        return _render_pool
+
+
+def warm_up_render_pool() -> None:
+    """
+    Start the render pool's worker processes and wait until they are ready.
+
+    Each worker imports WeasyPrint and loads the template resources in its
+    initializer, so the first catalog request does not pay for it.
+    """
+    pool = get_render_pool()
+    futures = [pool.submit(os.getpid) for _ in range(RENDER_POOL_SIZE)]
+    for future in futures:
+        future.result()
+
+
+def render_pool_state() -> Dict[str, Any]:
+    """Render pool status for readiness checks, without starting the pool."""
+    return {
+        'started': _render_pool is not None,
+        'workers': RENDER_POOL_SIZE,
+        'broken': bool(getattr(_render_pool, '_broken', False)),
+    }
+
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking function in the bounded thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_in_auth_pool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run password hashing work in the auth pool.
+
+    Raises:
+        PoolBusyError: If AUTH_MAX_PENDING calls are already queued or running
+    """
+    if not _auth_slots.acquire(blocking=False):
+        raise PoolBusyError(f"Auth pool busy ({AUTH_MAX_PENDING} pending)")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_auth_pool(), functools.partial(func, *args, **kwargs))
+    finally:
+        _auth_slots.release()
+
+
+def _replace_broken_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken render pool so the next call starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not pool:
+            # Already replaced by another caller
+            return
+        _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    logger.warning("Render process pool broke (a worker died); starting a new one")
+
+
+async def run_in_render_pool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a picklable, module-level function in the render process pool.
+
+    If a worker dies (OOM kill, crash, failing initializer) the pool is
+    broken for good; it is then replaced and the call retried once.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_render_pool()
+        try:
+            return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        except BrokenProcessPool:
+            _replace_broken_render_pool(pool)
+            if attempt:
+                raise
+
+
+def shutdown() -> None:
+    """Shut down all pools, waiting for running work to finish."""
+    global _thread_pool, _render_pool, _auth_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True, cancel_futures=True)
+        _render_pool = None
+    if _auth_pool is not None:
+        _auth_pool.shutdown(wait=True, cancel_futures=True)
+        _auth_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True, cancel_futures=True)
+        _thread_pool = None